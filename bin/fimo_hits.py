@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+"""Queries the indexed FIMO hit store written by COMBINE_RESULTS (fimo_index).
+
+Usage:
+    fimo_hits.py fimo_index --sequence chr1:1000-2000
+    fimo_hits.py fimo_index --region chr1:1500-1600
+    fimo_hits.py fimo_index --motif MA0139.1
+
+Hits are printed in the fimo.tsv layout, without the matched sequence.
+"""
+
+import argparse
+import array
+import bisect
+import json
+import sys
+
+FIELDS = ["motif_id", "motif_alt_id", "sequence_name", "start", "stop", "strand", "score", "p-value", "q-value"]
+STRANDS = {1: "+", -1: "-", 0: "."}
+
+
+class FimoHits:
+    """Read access to a fimo_index directory.
+
+    The column files are loaded once, every query is then a binary search over the
+    hits of one sequence or a slice of the motif row list.
+    """
+
+    def __init__(self, path: str):
+        with open(f"{path}/index.json") as f:
+            meta = json.load(f)
+        self.max_width = meta["max_width"]
+
+        self.columns = {}
+        for name, code in meta["columns"].items():
+            self.columns[name] = self._read_array(f"{path}/{name}.bin", code, meta["rows"], meta["byteorder"])
+        self.motif_rows = self._read_array(f"{path}/motif_rows.bin", "q", meta["rows"], meta["byteorder"])
+
+        self.motifs = []
+        self.motif_ranges = []
+        self.motif_codes = {}
+        with open(f"{path}/motifs.tsv") as f:
+            for line in f:
+                code, motif_id, motif_alt_id, first, end = line.rstrip("\n").split("\t")
+                self.motifs.append((motif_id, motif_alt_id))
+                self.motif_ranges.append((int(first), int(end)))
+                for name in (motif_id, motif_alt_id):
+                    self.motif_codes.setdefault(name, []).append(int(code))
+
+        # Sequences named like chrom:start-end (bedtools getfasta) are also indexed by genomic position
+        self.sequences = {}
+        self.sequence_firsts = []
+        self.sequence_names = []
+        self.regions = {}
+        with open(f"{path}/sequences.tsv") as f:
+            for line in f:
+                name, first, end = line.rstrip("\n").split("\t")
+                self.sequences[name] = (int(first), int(end))
+                self.sequence_firsts.append(int(first))
+                self.sequence_names.append(name)
+                chrom, _, span = name.rpartition(":")
+                region_start, _, region_end = span.partition("-")
+                if chrom and region_start.isdigit() and region_end.isdigit():
+                    self.regions.setdefault(chrom, []).append((int(region_start), int(region_end), name))
+        for regions in self.regions.values():
+            regions.sort()
+        self.region_ends = {chrom: [end for _, end, _ in regions] for chrom, regions in self.regions.items()}
+
+    @staticmethod
+    def _read_array(path: str, code: str, rows: int, byteorder: str) -> array.array:
+        values = array.array(code)
+        with open(path, "rb") as f:
+            values.fromfile(f, rows)
+        if byteorder != sys.byteorder:
+            values.byteswap()
+        return values
+
+    def _hit(self, row: int, sequence_name: str) -> dict:
+        motif_id, motif_alt_id = self.motifs[self.columns["motif"][row]]
+        return {
+            "motif_id": motif_id,
+            "motif_alt_id": motif_alt_id,
+            "sequence_name": sequence_name,
+            "start": self.columns["start"][row],
+            "stop": self.columns["stop"][row],
+            "strand": STRANDS[self.columns["strand"][row]],
+            "score": self.columns["score"][row],
+            "p-value": self.columns["p-value"][row],
+            "q-value": self.columns["q-value"][row],
+        }
+
+    def sequence(self, name: str, start: int = None, stop: int = None) -> list:
+        """Hits on a sequence, optionally only those overlapping start-stop (1-based, in sequence coordinates).
+
+        Args:
+            name (str): Sequence name as in fimo.tsv.
+            start (int): First position of the window.
+            stop (int): Last position of the window.
+
+        Returns:
+            list: Hits as dictionaries with the fimo.tsv fields, ordered by position.
+        """
+        if name not in self.sequences:
+            return []
+        first, end = self.sequences[name]
+        if start is None and stop is None:
+            return [self._hit(row, name) for row in range(first, end)]
+
+        starts = self.columns["start"]
+        start = 1 if start is None else start
+        lo = bisect.bisect_left(starts, start - self.max_width + 1, first, end)
+        hi = end if stop is None else bisect.bisect_right(starts, stop, first, end)
+        return [self._hit(row, name) for row in range(lo, hi) if self.columns["stop"][row] >= start]
+
+    def region(self, chrom: str, start: int, stop: int) -> list:
+        """Hits overlapping a genomic region (1-based, inclusive).
+
+        Only sequences named like chrom:start-end are searched, their hits keep the
+        sequence coordinates of fimo.tsv. The sequences of a chromosome must not
+        overlap, which holds for the merged enhancer regions scanned by FIMO.
+
+        Args:
+            chrom (str): Chromosome name.
+            start (int): First position of the region.
+            stop (int): Last position of the region.
+
+        Returns:
+            list: Hits as dictionaries with the fimo.tsv fields.
+        """
+        regions = self.regions.get(chrom, [])
+        hits = []
+        for i in range(bisect.bisect_left(self.region_ends.get(chrom, []), start), len(regions)):
+            region_start, _, name = regions[i]
+            if region_start >= stop:
+                break
+            hits.extend(self.sequence(name, start - region_start, stop - region_start))
+        return hits
+
+    def motif(self, name: str) -> list:
+        """Hits of a motif, by motif ID or alternative ID (TF name).
+
+        Args:
+            name (str): Motif ID or alternative ID.
+
+        Returns:
+            list: Hits as dictionaries with the fimo.tsv fields, grouped by motif and ordered by position.
+        """
+        hits = []
+        for code in self.motif_codes.get(name, []):
+            first, end = self.motif_ranges[code]
+            for row in self.motif_rows[first:end]:
+                sequence_name = self.sequence_names[bisect.bisect_right(self.sequence_firsts, row) - 1]
+                hits.append(self._hit(row, sequence_name))
+        return hits
+
+
+def parse_region(region: str) -> tuple:
+    chrom, _, span = region.rpartition(":")
+    start, _, stop = span.partition("-")
+    return chrom, int(start), int(stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the indexed FIMO hit store.")
+    parser.add_argument("index", help="fimo_index directory written by COMBINE_RESULTS")
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--sequence", help="Sequence name, e.g. chr1:1000-2000")
+    query.add_argument("--region", help="Genomic region chrom:start-stop (1-based, inclusive)")
+    query.add_argument("--motif", help="Motif ID or TF name")
+    args = parser.parse_args()
+
+    store = FimoHits(args.index)
+    if args.sequence:
+        hits = store.sequence(args.sequence)
+    elif args.region:
+        hits = store.region(*parse_region(args.region))
+    else:
+        hits = store.motif(args.motif)
+
+    print("\t".join(FIELDS))
+    for hit in hits:
+        print("\t".join(str(hit[field]) for field in FIELDS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""Gene ID helpers shared by the Python templates of the local modules.
+
+bin/ is on the PATH of every task, so a template imports this module with:
+
+    sys.path.insert(0, os.path.dirname(shutil.which("gene_ids.py")))
+    from gene_ids import remove_version, build_symbol_lookup, map_symbols
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def remove_version(gene_ids: pd.Index) -> pd.Index:
+    """Strips the version suffix from all gene IDs at once (ENSG00000141510.17 -> ENSG00000141510).
+
+    Args:
+        gene_ids (pd.Index): Gene IDs, with or without version.
+
+    Returns:
+        pd.Index: Gene IDs without version.
+    """
+    return gene_ids.str.split(".", n=1).str[0]
+
+
+def build_symbol_lookup(df_genes: pd.DataFrame) -> tuple:
+    """Builds the gene ID to upper-case symbol lookup of a gene map once.
+
+    Symbols are stored in one array, a gene ID is resolved to its position (code) in that array.
+    The array ends with NaN, so the code -1 of an unknown gene ID takes NaN. Like a dictionary
+    built from the map, the last row of a duplicated gene ID wins.
+
+    Args:
+        df_genes (pd.DataFrame): Gene map indexed by gene ID, with a 'gene_name' column.
+
+    Returns:
+        tuple: Unique gene IDs and the upper-case symbol at the same position.
+    """
+    unique = ~df_genes.index.duplicated(keep="last")
+    symbols = df_genes["gene_name"].str.upper().to_numpy(dtype=object)[unique]
+    return df_genes.index[unique], np.append(symbols, np.nan)
+
+
+def map_symbols(gene_ids: pd.Index, lookup: tuple, keep_unmapped: bool = False) -> pd.Index:
+    """Maps gene IDs to upper-case symbols with a single vectorized take.
+
+    Args:
+        gene_ids (pd.Index): Gene IDs to map.
+        lookup (tuple): Lookup built by build_symbol_lookup.
+        keep_unmapped (bool): Keep unknown IDs (upper-cased) instead of setting them to NaN.
+
+    Returns:
+        pd.Index: Upper-case symbols.
+    """
+    lookup_ids, symbols = lookup
+    codes = lookup_ids.get_indexer(gene_ids)
+    mapped = symbols[codes]
+    if keep_unmapped:
+        mapped = np.where(codes >= 0, mapped, gene_ids.str.upper())
+    return pd.Index(mapped, name=gene_ids.name)
@@ -158,6 +158,12 @@ generated_parameters = {
         section_title=None,
         description='Randomize the data for dynamite.',
     ),
+    'dynamite_performance': NextflowParameter(
+        type=typing.Optional[bool],
+        default='false',
+        section_title=None,
+        description='Evaluate the dynamite models on outer cross validation folds.',
+    ),
     'dynamite_min_regression': NextflowParameter(
         type=typing.Optional[float],
         default=0.1,
@@ -170,6 +176,36 @@ generated_parameters = {
         section_title=None,
         description='Alpha value for the Mann-Whitney U test.',
     ),
+    'score_format': NextflowParameter(
+        type=typing.Optional[str],
+        default='tsv',
+        section_title=None,
+        description='File format of the TF-TG score matrices.',
+    ),
+    'fimo_motif_batches': NextflowParameter(
+        type=typing.Optional[int],
+        default=0,
+        section_title=None,
+        description='Number of size balanced motif batches for FIMO.',
+    ),
+    'fimo_sequence_chunks': NextflowParameter(
+        type=typing.Optional[int],
+        default=1,
+        section_title=None,
+        description='Number of chunks the enhancer sequences are split into for FIMO.',
+    ),
+    'motif_scanner': NextflowParameter(
+        type=typing.Optional[str],
+        default='fimo',
+        section_title=None,
+        description='Tool used to scan the enhancer sequences for motif hits.',
+    ),
+    'fimo_index_hits': NextflowParameter(
+        type=typing.Optional[bool],
+        default='false',
+        section_title=None,
+        description='Write an indexed store of the combined motif hits.',
+    ),
     'genome': NextflowParameter(
         type=typing.Optional[str],
         default=None,
@@ -206,6 +242,18 @@ generated_parameters = {
         section_title=None,
         description='NCBI Taxonomy ID.',
     ),
+    'jaspar_db': NextflowParameter(
+        type=typing.Optional[LatchFile],
+        default=None,
+        section_title=None,
+        description='Local JASPAR SQLite database or JASPAR flat file to fetch the motifs from.',
+    ),
+    'jaspar_cache': NextflowParameter(
+        type=typing.Optional[str],
+        default=None,
+        section_title=None,
+        description='Directory of the JASPAR motif cache.',
+    ),
     'multiqc_methods_description': NextflowParameter(
         type=typing.Optional[str],
         default=None,
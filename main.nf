@@ -22,6 +22,7 @@ include { PIPELINE_INITIALISATION } from './subworkflows/local/utils_nfcore_tfac
 include { PIPELINE_COMPLETION     } from './subworkflows/local/utils_nfcore_tfactivity_pipeline'
 
 include { getGenomeAttribute      } from './subworkflows/local/utils_nfcore_tfactivity_pipeline'
+include { fileChecksum            } from './subworkflows/local/utils_nfcore_tfactivity_pipeline'
 include { PREPARE_GENOME          } from './subworkflows/local/prepare_genome'
 
 /*
@@ -65,6 +66,8 @@ workflow NFCORE_TFACTIVITY {
     ch_motifs  = params.motifs ? Channel.value(file(params.motifs, checkIfExists: true)) : Channel.empty()
     ch_counts = Channel.value(file(params.counts, checkIfExists: true))
     ch_taxon_id = (!params.motifs && params.taxon_id) ? Channel.value(params.taxon_id) : Channel.empty()
+    ch_jaspar_db = params.jaspar_db ? Channel.value(file(params.jaspar_db, checkIfExists: true))
+                                            .map{ database -> [[id: fileChecksum(database)], database] } : Channel.value([[:], []])
 
     //
     // SUBWORKFLOW: Prepare genome
@@ -88,9 +91,11 @@ workflow NFCORE_TFACTIVITY {
         ch_blacklist,
         ch_motifs,
         ch_taxon_id,
+        ch_jaspar_db,
         PREPARE_GENOME.out.gene_lengths,
         PREPARE_GENOME.out.gene_map,
         PREPARE_GENOME.out.chrom_sizes,
+        PREPARE_GENOME.out.tss_index,
 
         // ChromHMM
         samplesheet_bam,
@@ -120,10 +125,16 @@ workflow NFCORE_TFACTIVITY {
         params.dynamite_ifolds,
         params.dynamite_alpha,
         params.dynamite_randomize,
+        params.dynamite_performance,
 
         // Ranking
         params.alpha,
 
+        // FIMO
+        params.fimo_motif_batches,
+        params.fimo_sequence_chunks,
+        params.motif_scanner,
+
         ch_versions
     )
 
@@ -12,11 +12,19 @@ process COMBINE_TABLES {
     val(method)
 
     output:
-    tuple val(meta), path("${prefix}.${extension}"), emit: combined
-    path "versions.yml"                            , emit: versions
+    tuple val(meta), path(combined)                      , emit: combined
+    tuple val(meta), path("${prefix}.mean.${extension}") , emit: mean    , optional: true
+    tuple val(meta), path("${prefix}.sum.${extension}")  , emit: sum     , optional: true
+    tuple val(meta), path("${prefix}.ratio.${extension}"), emit: ratio   , optional: true
+    tuple val(meta), path("${prefix}.rank.${extension}") , emit: rank    , optional: true
+    path "versions.yml"                                  , emit: versions
 
     script:
     prefix = task.ext.prefix ?: "${meta.id}"
     extension = task.ext.extension ?: "tsv"
+    reduction = task.ext.reduction ?: "stream"
+    // With several methods, the combined output is the table of the first method
+    methods = method.tokenize(",")
+    combined = methods.size() > 1 ? "${prefix}.${methods[0]}.${extension}" : "${prefix}.${extension}"
     template "combine_tables.py"
 }
@@ -23,69 +23,155 @@ def format_yaml_like(data: dict, indent: int = 0) -> str:
             yaml_str += f"{spaces}{key}: {value}\\n"
     return yaml_str
 
-method = "$method"
-if method not in ["mean", "sum", "ratio", "rank"]:
-    raise ValueError("Invalid method. Must be one of 'mean', 'sum', 'ratio', 'rank'.")
-
-# Read all input files into a list of dataframes
-dfs = [pd.read_csv(file, sep='\\t', index_col=0) for file in "${files.join(' ')}".split()]
-
-if method in ["sum", "rank"]:
-    index_union = dfs[0].index
-    col_union = dfs[0].columns
-    for df in dfs[1:]:
-        index_union = index_union.union(df.index)
-        col_union = col_union.union(df.columns)
-
-    # Add zero values for missing rows
-    dfs = [df.reindex(index_union).fillna(0, inplace=False) for df in dfs]
-    dfs = [df.reindex(columns=col_union).fillna(0, inplace=False) for df in dfs]
-else:
-    index_intersection = dfs[0].index
-    for df in dfs[1:]:
-        index_intersection = index_intersection.intersection(df.index)
-
-    print(f"Number of rows in intersection: {len(index_intersection)}")
-    # Keep row indices which are available in all dataframes
-    dfs = [df.loc[index_intersection] for df in dfs]
+def read_table_axes(path: str) -> tuple:
+    """Reads the row and column names of a table without loading its values.
 
-# Check if all dataframes have the same dimensions
-if not all(df.shape == dfs[0].shape for df in dfs):
-    raise ValueError(f"The input files must have the same dimensions. Got: {[df.shape for df in dfs]}")
+    Args:
+        path (str): Path to a TSV table.
 
-# Check if all dataframes have the same row names
-if not all(df.index.equals(dfs[0].index) for df in dfs):
-    raise ValueError("The input files must have the same row names.")
+    Returns:
+        tuple: Row names and column names as pd.Index.
+    """
+    columns = pd.read_csv(path, sep="\\t", index_col=0, nrows=0).columns
+    index = pd.read_csv(path, sep="\\t", index_col=0, usecols=[0]).index
+    return index, columns
 
-# Check if all dataframes have the same column names
-if not all(df.columns.equals(dfs[0].columns) for df in dfs):
-    raise ValueError("The input files must have the same column names.")
+def stream_reduce(files: list, method: str) -> pd.DataFrame:
+    """Combines the tables one file at a time into a single aligned buffer.
 
-# Calculate the selected statistic
-if method == "mean":
-    result = sum(dfs) / len(dfs)
-elif method == "rank":
-    result = 1 - (sum(dfs).rank(ascending=False) / len(dfs[0].index))
-elif method == "sum":
-    result = sum(dfs)
-elif method == "ratio":
-    if len(dfs) != 2:
-        raise ValueError("The ratio method requires exactly two input files.")
+    Only the row and column names are read upfront. The union ('sum', 'rank') or
+    intersection ('mean') of the row names is built from them, then every table is
+    loaded, aligned and added to the buffer before the next one is read.
 
-    # Replace 0 values with minimal existing float value
-    dfs[1] = dfs[1].replace(0, np.finfo(float).eps)
+    Args:
+        files (list): Paths to the input tables.
+        method (str): One of 'mean', 'sum', 'rank'.
 
-    result = dfs[0] / dfs[1]
+    Returns:
+        pd.DataFrame: The combined table.
+    """
+    axes = [read_table_axes(file) for file in files]
+
+    index, columns = axes[0]
+    if method in ["sum", "rank"]:
+        for file_index, file_columns in axes[1:]:
+            index = index.union(file_index)
+            columns = columns.union(file_columns)
+    else:
+        for file_index, file_columns in axes[1:]:
+            if not file_columns.equals(columns):
+                raise ValueError("The input files must have the same column names.")
+            index = index.intersection(file_index)
+
+        print(f"Number of rows in intersection: {len(index)}")
+
+    total = np.zeros((len(index), len(columns)))
+    for file in files:
+        df = pd.read_csv(file, sep="\\t", index_col=0)
+        if method in ["sum", "rank"]:
+            # Add zero values for missing rows and columns
+            df = df.reindex(index=index, columns=columns).fillna(0)
+        else:
+            df = df.loc[index]
+        total += df.to_numpy(dtype=np.float64)
+        del df
 
-    print(f"Number of rows before dropping NA or inf values: {len(result)}")
+    total = pd.DataFrame(total, index=index, columns=columns)
+    if method == "mean":
+        return total / len(files)
+    if method == "rank":
+        return 1 - (total.rank(ascending=False) / len(index))
+    return total
 
-    # Drop rows with NA or inf values (requirement for DYNAMITE)
-    result = result.replace([np.inf, -np.inf], np.nan).dropna()
+def combine_in_memory(dfs: list, method: str) -> pd.DataFrame:
+    """Aligns tables which are all loaded in memory and combines them.
 
-    print(f"Number of rows after dropping NA or inf values: {len(result)}")
+    Args:
+        dfs (list): The input tables, left unchanged.
+        method (str): One of 'mean', 'sum', 'ratio', 'rank'.
 
-# Write the result to a file
-result.to_csv("${prefix}.${extension}", sep='\\t', index=True, quoting=0)
+    Returns:
+        pd.DataFrame: The combined table.
+    """
+    if method in ["sum", "rank"]:
+        index_union = dfs[0].index
+        col_union = dfs[0].columns
+        for df in dfs[1:]:
+            index_union = index_union.union(df.index)
+            col_union = col_union.union(df.columns)
+
+        # Add zero values for missing rows
+        dfs = [df.reindex(index_union).fillna(0, inplace=False) for df in dfs]
+        dfs = [df.reindex(columns=col_union).fillna(0, inplace=False) for df in dfs]
+    else:
+        index_intersection = dfs[0].index
+        for df in dfs[1:]:
+            index_intersection = index_intersection.intersection(df.index)
+
+        print(f"Number of rows in intersection: {len(index_intersection)}")
+        # Keep row indices which are available in all dataframes
+        dfs = [df.loc[index_intersection] for df in dfs]
+
+    # Check if all dataframes have the same dimensions
+    if not all(df.shape == dfs[0].shape for df in dfs):
+        raise ValueError(f"The input files must have the same dimensions. Got: {[df.shape for df in dfs]}")
+
+    # Check if all dataframes have the same row names
+    if not all(df.index.equals(dfs[0].index) for df in dfs):
+        raise ValueError("The input files must have the same row names.")
+
+    # Check if all dataframes have the same column names
+    if not all(df.columns.equals(dfs[0].columns) for df in dfs):
+        raise ValueError("The input files must have the same column names.")
+
+    # Calculate the selected statistic
+    if method == "mean":
+        result = sum(dfs) / len(dfs)
+    elif method == "rank":
+        result = 1 - (sum(dfs).rank(ascending=False) / len(dfs[0].index))
+    elif method == "sum":
+        result = sum(dfs)
+    elif method == "ratio":
+        if len(dfs) != 2:
+            raise ValueError("The ratio method requires exactly two input files.")
+
+        # Replace 0 values with minimal existing float value
+        dfs[1] = dfs[1].replace(0, np.finfo(float).eps)
+
+        result = dfs[0] / dfs[1]
+
+        print(f"Number of rows before dropping NA or inf values: {len(result)}")
+
+        # Drop rows with NA or inf values (requirement for DYNAMITE)
+        result = result.replace([np.inf, -np.inf], np.nan).dropna()
+
+        print(f"Number of rows after dropping NA or inf values: {len(result)}")
+
+    return result
+
+methods = "$method".split(",")
+if not methods or any(method not in ["mean", "sum", "ratio", "rank"] for method in methods):
+    raise ValueError("Invalid method. Must be one or more of 'mean', 'sum', 'ratio', 'rank'.")
+
+reduction = "$reduction"
+if reduction not in ["stream", "memory"]:
+    raise ValueError("Invalid reduction. Must be one of 'stream', 'memory'.")
+
+files = "${files.join(' ')}".split()
+
+def output_path(method: str) -> str:
+    """A single method writes the plain output, several methods get one output each."""
+    if len(methods) == 1:
+        return "${prefix}.${extension}"
+    return f"${prefix}.{method}.${extension}"
+
+if reduction == "stream" and len(methods) == 1 and methods[0] != "ratio":
+    stream_reduce(files, methods[0]).to_csv(output_path(methods[0]), sep="\\t")
+else:
+    # Read all input files once and share them between the methods
+    dfs = [pd.read_csv(file, sep="\\t", index_col=0) for file in files]
+    for method in methods:
+        combine_in_memory(dfs, method).to_csv(output_path(method), sep="\\t")
 
 # Create version file
 versions = {
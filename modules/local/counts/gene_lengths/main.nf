@@ -1,6 +1,6 @@
-process CALCULATE_TPM {
+process GENE_LENGTHS {
     tag "$meta.id"
-    label "process_single"
+    label 'process_single'
 
     conda "conda-forge::mulled-v2-2076f4a3fb468a04063c9e6b7747a630abb457f6==fccb0c41a243c639e11dd1be7b74f563e624fcca-0"
     container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
@@ -8,15 +8,19 @@ process CALCULATE_TPM {
         'biocontainers/mulled-v2-2076f4a3fb468a04063c9e6b7747a630abb457f6:fccb0c41a243c639e11dd1be7b74f563e624fcca-0' }"
 
     input:
-    tuple val(meta), path(counts)
+    tuple val(meta), path(gtf)
     tuple val(meta2), path(lengths)
     tuple val(meta3), path(gene_map)
 
     output:
-    tuple val(meta), path("*.tpm.tsv"), emit: tpm
-
-    path  "versions.yml"              , emit: versions
+    tuple val(meta), path("*.gene_lengths.npz"), emit: lengths
+    path("versions.yml")                       , emit: versions
 
     script:
-    template "calculate_tpm.py"
+    template "gene_lengths.py"
+
+    stub:
+    """
+    touch "${meta.id}.gene_lengths.npz"
+    """
 }
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import hashlib
+import numpy as np
+import os
+import pandas as pd
+import platform
+import shutil
+import sys
+
+# bin/ is on the PATH of the task, not on the Python path
+sys.path.insert(0, os.path.dirname(shutil.which("gene_ids.py")))
+from gene_ids import build_symbol_lookup, map_symbols
+
+def format_yaml_like(data: dict, indent: int = 0) -> str:
+    """Formats a dictionary to a YAML-like string.
+
+    Args:
+        data (dict): The dictionary to format.
+        indent (int): The current indentation level.
+
+    Returns:
+        str: A string formatted as YAML.
+    """
+    yaml_str = ""
+    for key, value in data.items():
+        spaces = "  " * indent
+        if isinstance(value, dict):
+            yaml_str += f"{spaces}{key}:\\n{format_yaml_like(value, indent + 1)}"
+        else:
+            yaml_str += f"{spaces}{key}: {value}\\n"
+    return yaml_str
+
+gtf_path = "$gtf"
+
+# Checksum of the annotation, used to key the lengths file
+checksum = hashlib.sha256()
+with open(gtf_path, "rb") as f:
+    for chunk in iter(lambda: f.read(1 << 20), b""):
+        checksum.update(chunk)
+checksum = checksum.hexdigest()
+
+df_lengths = pd.read_csv("$lengths", index_col=0, header=0, sep="\\t", usecols=["gene", "merged"])
+df_genes = pd.read_csv("$gene_map", sep="\\t", index_col=0)
+
+# Mean merged exon length (in kb) of every upper-case gene symbol
+symbols = map_symbols(df_lengths.index, build_symbol_lookup(df_genes))
+lengths = (df_lengths["merged"] / 1e3).groupby(symbols).mean()
+
+# Plain arrays, so the counts processing loads the vector without pickle
+np.savez(f"{checksum[:16]}.gene_lengths.npz",
+         symbols=lengths.index.to_numpy(dtype=str),
+         lengths=lengths.to_numpy(dtype=np.float64))
+
+print(f"Stored lengths of {len(lengths)} genes of annotation {checksum}")
+
+# Create version file
+versions = {
+    "${task.process}" : {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__
+    }
+}
+
+with open("versions.yml", "w") as f:
+    f.write(format_yaml_like(versions))
@@ -0,0 +1,37 @@
+process PROCESS_COUNTS {
+    tag "$meta.id"
+    label "process_single"
+
+    conda "conda-forge::mulled-v2-2076f4a3fb468a04063c9e6b7747a630abb457f6==fccb0c41a243c639e11dd1be7b74f563e624fcca-0"
+    container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
+        'https://depot.galaxyproject.org/singularity/mulled-v2-2076f4a3fb468a04063c9e6b7747a630abb457f6:fccb0c41a243c639e11dd1be7b74f563e624fcca-0':
+        'biocontainers/mulled-v2-2076f4a3fb468a04063c9e6b7747a630abb457f6:fccb0c41a243c639e11dd1be7b74f563e624fcca-0' }"
+
+    input:
+    tuple val(meta), path(counts)
+    tuple val(samples), path(extra_files)
+    tuple val(meta2), path(gene_map)
+    tuple val(meta3), path(lengths)
+    val(agg_method)
+    val(min_count)
+    val(min_tpm)
+    val(min_count_tf)
+    val(min_tpm_tf)
+
+    output:
+    tuple val(meta), path("*.clean.tsv")                      , emit: counts
+    tuple val(meta), path("genes.txt")                        , emit: genes
+    tuple val(meta), path("*.tpm.tsv")                        , emit: tpm
+    tuple val(meta), path("${meta.id}.counts_filtered.tsv")   , emit: filtered_counts
+    tuple val(meta), path("${meta.id}.tpm_filtered.tsv")      , emit: filtered_tpms
+    tuple val(meta), path("${meta.id}.genes_filtered.txt")    , emit: filtered_genes
+    tuple val(meta_tfs), path("${meta_tfs.id}.counts_filtered.tsv"), emit: tf_counts
+    tuple val(meta_tfs), path("${meta_tfs.id}.tpm_filtered.tsv")   , emit: tf_tpms
+    tuple val(meta_tfs), path("${meta_tfs.id}.genes_filtered.txt") , emit: tfs
+    path  "versions.yml"                                      , emit: versions
+
+    script:
+    tpm_dtype = task.ext.tpm_dtype ?: "float64"
+    meta_tfs = [id: "TFs"]
+    template "process_counts.py"
+}
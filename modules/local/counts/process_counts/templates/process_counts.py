@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import os
+import pandas as pd
+import platform
+import shutil
+import sys
+
+# bin/ is on the PATH of the task, not on the Python path
+sys.path.insert(0, os.path.dirname(shutil.which("gene_ids.py")))
+from gene_ids import remove_version, build_symbol_lookup, map_symbols
+
+def format_yaml_like(data: dict, indent: int = 0) -> str:
+    """Formats a dictionary to a YAML-like string.
+
+    Args:
+        data (dict): The dictionary to format.
+        indent (int): The current indentation level.
+
+    Returns:
+        str: A string formatted as YAML.
+    """
+    yaml_str = ""
+    for key, value in data.items():
+        spaces = "  " * indent
+        if isinstance(value, dict):
+            yaml_str += f"{spaces}{key}:\\n{format_yaml_like(value, indent + 1)}"
+        else:
+            yaml_str += f"{spaces}{key}: {value}\\n"
+    return yaml_str
+
+# Upper bound of count values read at once
+CHUNK_VALUES = 1 << 22
+
+def read_counts(path_counts: str, sample_files: dict) -> tuple:
+    """Reads the counts matrix and the extra sample columns in chunks of rows.
+
+    A counts file with a single column is a plain gene list without header.
+
+    Args:
+        path_counts (str): Path to the counts matrix.
+        sample_files (dict): Paths of the extra count columns by sample name.
+
+    Returns:
+        tuple: Name of the gene ID column and an iterator over numeric count chunks.
+    """
+    with open(path_counts) as f:
+        header = f.readline().rstrip("\\r\\n").split("\\t")
+
+    if len(header) == 1:
+        index_name, columns, skiprows = "gene_id", [], 0
+    else:
+        index_name, columns, skiprows = header[0], header[1:], 1
+
+    chunk_rows = max(1, CHUNK_VALUES // (len(columns) + len(sample_files) + 1))
+
+    def chunks():
+        counts_reader = pd.read_csv(path_counts, sep="\\t", header=None, skiprows=skiprows, index_col=0,
+                                    names=[index_name] + columns, dtype={index_name: str},
+                                    chunksize=chunk_rows)
+        sample_readers = {sample: pd.read_csv(path, header=None, chunksize=chunk_rows)
+                          for sample, path in sample_files.items()}
+
+        for chunk in counts_reader:
+            for sample, reader in sample_readers.items():
+                sample_chunk = next(reader, None)
+                if sample_chunk is None or len(sample_chunk) != len(chunk):
+                    raise ValueError(f"Counts file of sample {sample} does not match the length of the gene list")
+                chunk[sample] = sample_chunk[0].to_numpy()
+            yield chunk.apply(pd.to_numeric)
+
+        for sample, reader in sample_readers.items():
+            if next(reader, None) is not None:
+                raise ValueError(f"Counts file of sample {sample} does not match the length of the gene list")
+
+    return index_name, chunks()
+
+def aggregate_chunks(chunks, agg_method: str) -> pd.DataFrame:
+    """Aggregates rows sharing an index value over a stream of chunks.
+
+    Sum, mean, max and min are accumulated chunk by chunk, so only the aggregated rows are kept in
+    memory. Any other method needs all rows of a group and aggregates the concatenated chunks.
+
+    Args:
+        chunks (iterable): DataFrames with the same columns.
+        agg_method (str): Pandas aggregation method.
+
+    Returns:
+        pd.DataFrame: One row per index value, sorted by index.
+    """
+    if agg_method not in ["sum", "mean", "max", "min"]:
+        counts = pd.concat(list(chunks))
+        return counts.groupby(counts.index).agg(agg_method)
+
+    # A mean is accumulated as sum and number of values
+    partial_method = "sum" if agg_method == "mean" else agg_method
+    partials = ["values", "n"] if agg_method == "mean" else ["values"]
+    total = None
+
+    for chunk in chunks:
+        grouped = chunk.groupby(chunk.index)
+        part = {"values": grouped.agg(partial_method), "n": grouped.count()}
+        if total is None:
+            total = {key: part[key] for key in partials}
+            continue
+        total = {key: pd.concat([total[key], part[key]]).groupby(level=0).agg("sum" if key == "n" else partial_method)
+                 for key in partials}
+
+    if agg_method == "mean":
+        return total["values"] / total["n"]
+    return total["values"]
+
+def combine_counts(path_counts: str, sample_files: dict, df_genes: pd.DataFrame, agg_method: str) -> pd.DataFrame:
+    """Reads the counts, adds the extra samples and aggregates them per upper-case gene symbol.
+
+    The counts are streamed in chunks, every chunk is mapped to symbols and folded into the aggregate.
+
+    Args:
+        path_counts (str): Path to the counts matrix.
+        sample_files (dict): Paths of the extra count columns by sample name.
+        df_genes (pd.DataFrame): Gene map indexed by gene ID, with a 'gene_name' column.
+        agg_method (str): Aggregation of genes sharing a symbol.
+
+    Returns:
+        pd.DataFrame: Counts per gene symbol.
+    """
+    df_genes = df_genes.set_axis(remove_version(df_genes.index))
+    lookup = build_symbol_lookup(df_genes)
+
+    # Keep only count values for genes which are present in the gene symbol mapping file
+    existing_symbols = df_genes["gene_name"].str.upper().to_list()
+
+    def mapped_chunks(chunks):
+        for chunk in chunks:
+            # Map gene ids to gene symbols
+            chunk.index = map_symbols(remove_version(chunk.index), lookup, keep_unmapped=True)
+            yield chunk[chunk.index.isin(existing_symbols)]
+
+    index_name, chunks = read_counts(path_counts, sample_files)
+    counts = aggregate_chunks(mapped_chunks(chunks), agg_method)
+    counts.index.name = index_name
+    return counts
+
+def read_gene_lengths(path_lengths: str) -> pd.Series:
+    """Reads the gene lengths written by GENE_LENGTHS.
+
+    Args:
+        path_lengths (str): Path to the .gene_lengths.npz file.
+
+    Returns:
+        pd.Series: Mean merged exon length (in kb) by upper-case gene symbol.
+    """
+    with np.load(path_lengths) as data:
+        return pd.Series(data["lengths"], index=data["symbols"].astype(object))
+
+def calculate_tpm(df_counts: pd.DataFrame, lengths: pd.Series, dtype: str) -> pd.DataFrame:
+    """Transcripts per million from the counts and the gene lengths, on one dense matrix.
+
+    Args:
+        df_counts (pd.DataFrame): Counts per gene symbol.
+        lengths (pd.Series): Gene lengths (in kb) by gene symbol.
+        dtype (str): Floating point type of the calculation, 'float32' or 'float64'.
+
+    Returns:
+        pd.DataFrame: TPM values, in the order of the counts.
+    """
+    gene_lengths = lengths.loc[df_counts.index].to_numpy(dtype=dtype)
+
+    # Samples x genes, so every per-sample sum runs over contiguous memory
+    counts = np.ascontiguousarray(df_counts.to_numpy(dtype=dtype).T)
+    rpk = counts / gene_lengths
+    scale = np.nansum(rpk, axis=1) / 1e6
+    return pd.DataFrame((rpk / scale[:, None]).T, index=df_counts.index, columns=df_counts.columns)
+
+def filter_genes(df_counts: pd.DataFrame, df_tpms: pd.DataFrame, count_sums: pd.Series, tpm_means: pd.Series,
+                 min_count: int, min_tpm: float, prefix: str):
+    """Keeps the genes passing both the count and the TPM threshold and writes the filtered tables.
+
+    Args:
+        df_counts (pd.DataFrame): Counts per gene symbol.
+        df_tpms (pd.DataFrame): TPM values per gene symbol.
+        count_sums (pd.Series): Sum of the counts of every gene.
+        tpm_means (pd.Series): Mean TPM of every gene.
+        min_count (int): Minimal sum of counts.
+        min_tpm (float): Minimal mean TPM.
+        prefix (str): Prefix of the output files.
+    """
+    gene_intersection = df_counts.index[count_sums >= min_count].intersection(df_tpms.index[tpm_means >= min_tpm])
+
+    # Subset the dataframes
+    df_counts = df_counts.loc[gene_intersection]
+    df_tpms = df_tpms.loc[gene_intersection]
+
+    # Rename index to gene_id
+    df_counts.index.name = "gene_id"
+    df_tpms.index.name = "gene_id"
+
+    # Write the output files
+    df_counts.to_csv(f"{prefix}.counts_filtered.tsv", sep="\\t")
+    df_tpms.to_csv(f"{prefix}.tpm_filtered.tsv", sep="\\t")
+
+    with open(f"{prefix}.genes_filtered.txt", "w") as f:
+        f.write("\\n".join(gene_intersection))
+
+tpm_dtype = "$tpm_dtype"
+if tpm_dtype not in ["float32", "float64"]:
+    raise ValueError("Invalid TPM type. Must be one of 'float32', 'float64'.")
+
+# The gene map is only needed for the symbol mapping, the gene lengths come from the GENE_LENGTHS npz
+df_genes = pd.read_csv("$gene_map", sep="\\t", index_col=0, dtype=str)
+
+sample_files = dict(zip("${samples.join(' ')}".split(), "${extra_files.join(' ')}".split()))
+
+counts = combine_counts("$counts", sample_files, df_genes, "$agg_method")
+
+counts.to_csv("${meta.id}.clean.tsv", sep="\\t")
+counts.index.to_series().to_csv("genes.txt", index=False, header=False)
+
+df_tpm = calculate_tpm(counts, read_gene_lengths("$lengths"), tpm_dtype)
+
+df_tpm.to_csv("${meta.id}.tpm.tsv", sep="\\t")
+
+# Both filters share the count sums and TPM means, only the thresholds differ
+count_sums = counts.sum(axis=1)
+tpm_means = df_tpm.mean(axis=1)
+
+filter_genes(counts, df_tpm, count_sums, tpm_means, int("$min_count"), float("$min_tpm"), "${meta.id}")
+filter_genes(counts, df_tpm, count_sums, tpm_means, int("$min_count_tf"), float("$min_tpm_tf"), "${meta_tfs.id}")
+
+# Create version file
+versions = {
+    "${task.process}" : {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+    }
+}
+
+with open("versions.yml", "w") as f:
+    f.write(format_yaml_like(versions))
@@ -12,6 +12,7 @@ process DYNAMITE {
     val(ifolds)
     val(alpha)
     val(randomize)
+    val(performance)
 
     output:
     tuple val(meta), path("${meta.id}_dynamite/Regression_Coefficients_Entire_Data_Set_classification.txt")
@@ -25,7 +26,7 @@ process DYNAMITE {
         --Ofolds=$ofolds \\
         --Ifolds=$ifolds \\
         --alpha=$alpha \\
-        --performance=TRUE \\
+        --performance=$performance \\
         --randomise=$randomize \\
         --cores=$task.cpus
     """
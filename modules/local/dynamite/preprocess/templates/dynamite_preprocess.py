@@ -2,8 +2,15 @@
 
 # Based on https://github.com/SchulzLab/TEPIC/blob/master/MachineLearningPipelines/DYNAMITE/Scripts/integrateData.py
 
+import os
 import pandas as pd
 import platform
+import shutil
+import sys
+
+# bin/ is on the PATH of the task, not on the Python path
+sys.path.insert(0, os.path.dirname(shutil.which("gene_ids.py")))
+from gene_ids import remove_version
 
 def format_yaml_like(data: dict, indent: int = 0) -> str:
     """Formats a dictionary to a YAML-like string.
@@ -27,11 +34,8 @@ def format_yaml_like(data: dict, indent: int = 0) -> str:
 df_affinities = pd.read_csv("$affinity_ratio".replace("\\\\", ""), sep="\\t", index_col=0)
 df_expression = pd.read_csv("$differential_expression".replace("\\\\", ""), sep="\\t", index_col=0)
 
-def remove_version(gene_id):
-    return gene_id.split(".")[0]
-
-df_affinities.index = df_affinities.index.map(remove_version)
-df_expression.index = df_expression.index.map(remove_version)
+df_affinities.index = remove_version(df_affinities.index)
+df_expression.index = remove_version(df_expression.index)
 
 gene_intersection = df_affinities.index.intersection(df_expression.index)
 
@@ -10,17 +10,23 @@ process COMBINE_RESULTS {
         path motif_files
 
     output:
-        path "fimo.tsv",     emit: tsv
-        path "fimo.gff",     emit: gff
-        path "versions.yml", emit: versions
+        path "fimo.tsv${suffix}", emit: tsv
+        path "fimo.gff${suffix}", emit: gff
+        path "fimo_index"       , emit: index, optional: true
+        path "versions.yml"     , emit: versions
 
     script:
     motif_files = motif_files.join(",")
+    compress = task.ext.compress ?: false
+    sort_hits = task.ext.sort_hits ?: false
+    index_hits = task.ext.index_hits ?: false
+    suffix = compress ? ".gz" : ""
     template "combine_results.py"
 
     stub:
+    suffix = task.ext.compress ? ".gz" : ""
     """
-    touch fimo.tsv
-    touch fimo.gff
+    touch fimo.tsv${suffix}
+    touch fimo.gff${suffix}
     """
 }
@@ -1,6 +1,14 @@
 #!/usr/bin/env python3
 
+import array
+import gzip
+import heapq
+import itertools
+import json
+import os
 import platform
+import sys
+import tempfile
 
 def format_yaml_like(data: dict, indent: int = 0) -> str:
     """Formats a dictionary to a YAML-like string.
@@ -22,29 +30,196 @@ def format_yaml_like(data: dict, indent: int = 0) -> str:
     return yaml_str
 
 
-output_dirs = "${motif_files}".split(',')
+# Upper bound of run files open at once while merging
+MAX_OPEN_RUNS = 256
+
+TSV_HEADER = 'motif_id\\tmotif_alt_id\\tsequence_name\\tstart\\tstop\\tstrand\\tscore\\tp-value\\tq-value\\tmatched_sequence'
+
+def read_records(path: str, skip_header: bool):
+    """Yields the hits of a FIMO output file, skipping comments, headers and empty lines.
+
+    Args:
+        path (str): Path to a fimo.tsv or fimo.gff file.
+        skip_header (bool): Whether to skip the 'motif_id' header line of TSV files.
+    """
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.rstrip('\\n')
+            if line == '' or line.startswith('#') or (skip_header and line.startswith('motif_id')):
+                continue
+            yield line
+
+def read_run(path: str):
+    """Yields the lines of a sorted run file."""
+    with open(path, 'r') as f:
+        for line in f:
+            yield line.rstrip('\\n')
+
+def position_key(sequence_column: int):
+    """Sort key on the sequence name, start and stop columns of a hit."""
+    def key(line: str) -> tuple:
+        fields = line.split('\\t')
+        return fields[sequence_column], int(fields[3]), int(fields[4])
+    return key
+
+def write_run(path: str, lines):
+    """Writes the lines to a run file, one per line."""
+    with open(path, 'w') as f:
+        for line in lines:
+            f.write(line + '\\n')
+
+def sorted_records(paths: list, skip_header: bool, key, run_dir: str):
+    """Yields the hits of all files sorted by position, holding one input file in memory at a time.
+
+    Every file is sorted on its own and written to a run file. The runs are merged in
+    passes of at most MAX_OPEN_RUNS runs until the last pass can be merged lazily.
+    Groups of consecutive runs are merged, so ties keep the order of the input files.
+    """
+    runs = []
+    for i, path in enumerate(paths):
+        run = f'{run_dir}/{i}.run'
+        write_run(run, sorted(read_records(path, skip_header), key=key))
+        runs.append(run)
+
+    merge_pass = 0
+    while len(runs) > MAX_OPEN_RUNS:
+        merge_pass += 1
+        merged = []
+        for i in range(0, len(runs), MAX_OPEN_RUNS):
+            group = runs[i:i + MAX_OPEN_RUNS]
+            run = f'{run_dir}/{merge_pass}_{len(merged)}.run'
+            write_run(run, heapq.merge(*[read_run(path) for path in group], key=key))
+            for path in group:
+                os.remove(path)
+            merged.append(run)
+        runs = merged
+
+    yield from heapq.merge(*[read_run(run) for run in runs], key=key)
 
-tsvs = []
-gffs = []
-for output in output_dirs:
-    with open(f'{output}/fimo.tsv', 'r') as f:
-        tsv = f.read().split('\\n')
-    with open(f'{output}/fimo.gff', 'r') as f:
-        gff = f.read().split('\\n')
+def write_lines(path: str, lines):
+    """Writes the lines joined by newlines, without a trailing newline, gzipped for '.gz' paths."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt') as f:
+        for i, line in enumerate(lines):
+            f.write(line if i == 0 else '\\n' + line)
 
-    tsvs.extend(tsv)
-    gffs.extend(gff)
+class HitIndexWriter:
+    """Writes position sorted TSV hits to an indexed store, read by bin/fimo_hits.py.
 
-tsvs = [line for line in tsvs if not line.startswith('#') and not line.startswith('motif_id') and not line == '']
-gffs = [line for line in gffs if not line.startswith('#') and not line == '']
+    The store is a directory with one binary column file per field, the row ranges of
+    every sequence, a motif dictionary and the rows of every motif. Columns are written
+    in chunks, so the hits are never all held as Python objects.
+    """
+
+    COLUMNS = {"start": "q", "stop": "q", "motif": "i", "strand": "b",
+                "score": "d", "p-value": "d", "q-value": "d"}
+    STRANDS = {"+": 1, "-": -1}
+    CHUNK_SIZE = 65536
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.files = {name: open(f"{path}/{name}.bin", "wb") for name in self.COLUMNS}
+        self.chunks = {name: array.array(code) for name, code in self.COLUMNS.items()}
+        self.motifs = {}
+        self.motif_counts = []
+        self.sequences = []
+        self.rows = 0
+        self.max_width = 0
+
+    def add(self, line: str):
+        fields = line.split('\\t')
+        motif = self.motifs.setdefault((fields[0], fields[1]), len(self.motifs))
+        if motif == len(self.motif_counts):
+            self.motif_counts.append(0)
+        self.motif_counts[motif] += 1
+
+        if not self.sequences or self.sequences[-1][0] != fields[2]:
+            self.sequences.append([fields[2], self.rows, self.rows])
+        self.sequences[-1][2] = self.rows + 1
+
+        start, stop = int(fields[3]), int(fields[4])
+        self.max_width = max(self.max_width, stop - start + 1)
+        for name, value in zip(self.COLUMNS, (start, stop, motif, self.STRANDS.get(fields[5], 0),
+                                               float(fields[6]), float(fields[7]),
+                                               float(fields[8]) if fields[8] else float("nan"))):
+            self.chunks[name].append(value)
+
+        self.rows += 1
+        if self.rows % self.CHUNK_SIZE == 0:
+            self.flush()
+
+    def flush(self):
+        for name, chunk in self.chunks.items():
+            chunk.tofile(self.files[name])
+            del chunk[:]
+
+    def close(self):
+        self.flush()
+        for f in self.files.values():
+            f.close()
+
+        # Group the rows by motif with a counting sort over the motif column
+        offsets = list(itertools.accumulate([0] + self.motif_counts))
+        motif_rows = array.array("q", bytes(8 * self.rows))
+        position = offsets[:-1]
+        codes = array.array(self.COLUMNS["motif"])
+        with open(f"{self.path}/motif.bin", "rb") as f:
+            codes.fromfile(f, self.rows)
+        for row, motif in enumerate(codes):
+            motif_rows[position[motif]] = row
+            position[motif] += 1
+        with open(f"{self.path}/motif_rows.bin", "wb") as f:
+            motif_rows.tofile(f)
+
+        with open(f"{self.path}/motifs.tsv", "w") as f:
+            for (motif_id, motif_alt_id), motif in self.motifs.items():
+                f.write(f"{motif}\\t{motif_id}\\t{motif_alt_id}\\t{offsets[motif]}\\t{offsets[motif + 1]}\\n")
+        with open(f"{self.path}/sequences.tsv", "w") as f:
+            for name, first, end in self.sequences:
+                f.write(f"{name}\\t{first}\\t{end}\\n")
+        with open(f"{self.path}/index.json", "w") as f:
+            json.dump({"rows": self.rows, "byteorder": sys.byteorder, "max_width": self.max_width,
+                        "columns": self.COLUMNS}, f, indent=4)
+
+def indexed(lines, writer: HitIndexWriter):
+    """Passes the hits through while adding them to the index."""
+    for line in lines:
+        writer.add(line)
+        yield line
+    writer.close()
+
+output_dirs = "${motif_files}".split(',')
+compress = "${compress}" == "true"
+sort_hits = "${sort_hits}" == "true"
+index_hits = "${index_hits}" == "true"
+suffix = '.gz' if compress else ''
 
-tsvs = ['motif_id\\tmotif_alt_id\\tsequence_name\\tstart\\tstop\\tstrand\\tscore\\tp-value\\tq-value\\tmatched_sequence'] + tsvs
+tsv_paths = [f'{output}/fimo.tsv' for output in output_dirs]
+gff_paths = [f'{output}/fimo.gff' for output in output_dirs]
 
-with open('fimo.tsv', 'w') as f:
-    f.write('\\n'.join(tsvs))
+if sort_hits:
+    with tempfile.TemporaryDirectory(dir='.') as run_dir:
+        hits = sorted_records(tsv_paths, True, position_key(2), run_dir)
+        if index_hits:
+            hits = indexed(hits, HitIndexWriter('fimo_index'))
+        write_lines(f'fimo.tsv{suffix}', itertools.chain([TSV_HEADER], hits))
+    with tempfile.TemporaryDirectory(dir='.') as run_dir:
+        write_lines(f'fimo.gff{suffix}', sorted_records(gff_paths, False, position_key(0), run_dir))
+else:
+    write_lines(f'fimo.tsv{suffix}', itertools.chain(
+        [TSV_HEADER], *[read_records(path, True) for path in tsv_paths]))
+    write_lines(f'fimo.gff{suffix}', itertools.chain(
+        *[read_records(path, False) for path in gff_paths]))
 
-with open('fimo.gff', 'w') as f:
-    f.write('\\n'.join(gffs))
+    # The index needs position sorted hits, so without sort_hits it costs a second,
+    # sorted pass over the TSV files. It is therefore only built on request.
+    if index_hits:
+        with tempfile.TemporaryDirectory(dir='.') as run_dir:
+            writer = HitIndexWriter('fimo_index')
+            for line in sorted_records(tsv_paths, True, position_key(2), run_dir):
+                writer.add(line)
+            writer.close()
 
 
 # Create version file
@@ -8,12 +8,14 @@ process FILTER_MOTIFS {
     input:
         tuple val(meta), path(tfs_jaspar_ids)
         tuple val(meta2), path(meme_motifs)
+        val(motif_batches)
 
     output:
         tuple val(meta), path("motifs/*.meme"), emit: motifs
         path "versions.yml",                    emit: versions
 
     script:
+    motifs_per_file = task.ext.motifs_per_file ?: ""
     template "filter_motifs.py"
 
     stub:
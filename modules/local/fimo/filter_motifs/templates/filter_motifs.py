@@ -1,41 +1,84 @@
 #!/usr/bin/env python3
 
 from os import mkdir
+import heapq
 import pandas as pd
 import platform
+import re
 from collections import defaultdict
 
 
-def parse_meme_file(path_meme_file):
-    with open(path_meme_file, "r") as f:
-        meme_file = f.read()
+def index_meme_file(path_meme_file):
+    """Finds the byte range of the header and of every MOTIF block in one pass.
 
-    lines = meme_file.split('\\n')
-    header = []
-    meme_to_matrix = {}
+    Args:
+        path_meme_file (str): Path to the MEME file.
+
+    Returns:
+        tuple: Header size in bytes, meme ID to (start, end) byte offsets, meme ID
+            to motif width, and symbol to the set of its meme IDs.
+    """
+    blocks = []
+    meme_to_width = {}
     symbol_to_meme = defaultdict(set)
-    current_motif = []
-    current_motif_meme = ""
-    is_header = True
-
-    for line in lines:
-        if line.startswith("MOTIF"):
-            # List not empty -> not first motif
-            if current_motif:
-                meme_to_matrix[current_motif_meme] = '\\n'.join(header + current_motif)
-                current_motif = []
-            current_motif_meme, current_motif_symbol = line.split()[1:3]
-            symbol_to_meme[current_motif_symbol].add(current_motif_meme)
-            is_header = False
-        if is_header:
-            header.append(line)
-        else:
-            current_motif.append(line)
+    position = 0
+
+    with open(path_meme_file, "rb") as f:
+        for line in f:
+            if line.startswith(b"MOTIF"):
+                current_motif_meme, current_motif_symbol = line.decode().split()[1:3]
+                symbol_to_meme[current_motif_symbol].add(current_motif_meme)
+                blocks.append((current_motif_meme, position))
+            elif line.startswith(b"letter-probability matrix"):
+                width = re.search(rb"w=\\s*(\\d+)", line)
+                meme_to_width[current_motif_meme] = int(width.group(1)) if width else 1
+            position += len(line)
+
+    # Every block ends where the next one starts, the last one at the end of the file
+    header_size = blocks[0][1] if blocks else position
+    ends = [start for _, start in blocks[1:]] + [position]
+    meme_to_offsets = {meme: (start, end) for (meme, start), end in zip(blocks, ends)}
+
+    return header_size, meme_to_offsets, meme_to_width, symbol_to_meme
+
+
+def balance_batches(meme_ids, meme_to_width, n_batches):
+    """Distributes motifs into batches of similar total width, largest motifs first.
+
+    The scanning time of a motif grows with its width times the sequence size, the
+    sequences are the same for all motifs, so balancing the widths balances the batches.
+
+    Args:
+        meme_ids (list): The motifs to distribute.
+        meme_to_width (dict): Width of every motif.
+        n_batches (int): Maximum number of batches.
+
+    Returns:
+        list: Non-empty lists of meme IDs.
+    """
+    batches = [[] for _ in range(min(n_batches, len(meme_ids)))]
+    loads = [(0, i) for i in range(len(batches))]
+    for meme_id in sorted(meme_ids, key=lambda meme_id: -meme_to_width.get(meme_id, 1)):
+        load, i = heapq.heappop(loads)
+        batches[i].append(meme_id)
+        heapq.heappush(loads, (load + meme_to_width.get(meme_id, 1), i))
+    return batches
+
 
-    if current_motif:
-        meme_to_matrix[current_motif_meme] = '\\n'.join(header + current_motif)
+def write_motifs(path_meme_file, path_output, header_size, offsets):
+    """Writes the MEME header followed by the given MOTIF blocks, copied as byte slices.
 
-    return meme_to_matrix, symbol_to_meme
+    Args:
+        path_meme_file (str): Path to the MEME file.
+        path_output (str): Path to the output MEME file.
+        header_size (int): Size of the MEME header in bytes.
+        offsets (list): (start, end) byte offsets of the MOTIF blocks to copy.
+    """
+    with open(path_meme_file, "rb") as f, open(path_output, "wb") as out:
+        out.write(f.read(header_size))
+        for start, end in offsets:
+            f.seek(start)
+            out.write(f.read(end - start))
 
 
 def format_yaml_like(data: dict, indent: int = 0) -> str:
@@ -65,10 +108,18 @@ path_meme_file = '${meme_motifs}'
 # Parse tfs_ranking
 tfs_ranking = pd.read_csv(tfs_ranking_file, sep='\\t', index_col=0).index.tolist()
 
-# Parse meme file
-meme_to_matrix, symbol_to_meme = parse_meme_file(path_meme_file)
+motif_batches = int('${motif_batches}')
+# Balanced batches and fixed size chunks are two ways to group the motifs, only one can be used
+if motif_batches > 0 and '${motifs_per_file}':
+    raise ValueError("ext.motifs_per_file cannot be combined with fimo_motif_batches > 0, set only one of them.")
+motifs_per_file = int('${motifs_per_file}' or 1)
+if motifs_per_file < 1:
+    raise ValueError("The number of motifs per file must be at least 1.")
 
-mkdir('motifs')
+# Index meme file
+header_size, meme_to_offsets, meme_to_width, symbol_to_meme = index_meme_file(path_meme_file)
+
+selected_memes = []
 for symbol in tfs_ranking:
     if symbol not in symbol_to_meme:
         # Check if symbol without version is in dictionary
@@ -78,9 +129,25 @@ for symbol in tfs_ranking:
             continue
         # Remove version from symbol
         symbol = base_symbol
-    for meme_id in symbol_to_meme[symbol]:
-        with open(f'motifs/{meme_id}.meme', 'w') as f:
-            f.write(meme_to_matrix[meme_id])
+    selected_memes.extend(sorted(symbol_to_meme[symbol]))
+
+# Keep the first occurrence of motifs shared by several symbols
+selected_memes = list(dict.fromkeys(selected_memes))
+
+mkdir('motifs')
+if motif_batches > 0:
+    # Size balanced batches, so that RUN_FIMO gets a fixed number of similar tasks
+    for batch, meme_ids in enumerate(balance_batches(selected_memes, meme_to_width, motif_batches)):
+        write_motifs(path_meme_file, f'motifs/batch_{batch:04d}.meme', header_size,
+                        [meme_to_offsets[meme_id] for meme_id in meme_ids])
+elif motifs_per_file == 1:
+    for meme_id in selected_memes:
+        write_motifs(path_meme_file, f'motifs/{meme_id}.meme', header_size, [meme_to_offsets[meme_id]])
+else:
+    # Group the motifs so that RUN_FIMO gets one task per chunk
+    for chunk, i in enumerate(range(0, len(selected_memes), motifs_per_file)):
+        write_motifs(path_meme_file, f'motifs/chunk_{chunk:04d}.meme', header_size,
+                        [meme_to_offsets[meme_id] for meme_id in selected_memes[i:i + motifs_per_file]])
 
 
 # Create version file
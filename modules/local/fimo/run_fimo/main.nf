@@ -7,8 +7,7 @@ process RUN_FIMO {
         'biocontainers/meme:5.5.5--pl5321hda358d9_0' }"
 
     input:
-        tuple val(meta),  path(motif_file)
-        tuple val(meta2), path(sequence_file)
+        tuple val(meta), path(motif_file), path(sequence_file)
 
     output:
         tuple val(meta), path("fimo_${meta.motif}"), emit: results
@@ -16,7 +15,9 @@ process RUN_FIMO {
 
     script:
     """
-    fimo --o fimo_${meta.motif} --max-stored-scores 1000000 ${motif_file} ${sequence_file}
+    # Keep the score limit per motif when a file holds several motifs
+    max_stored_scores=\$(( \$(grep -c '^MOTIF' ${motif_file}) * 1000000 ))
+    fimo --o fimo_${meta.motif} --max-stored-scores \$max_stored_scores ${motif_file} ${sequence_file}
 
     cat <<-END_VERSIONS > versions.yml
     "${task.process}":
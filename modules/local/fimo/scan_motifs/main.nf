@@ -1,6 +1,6 @@
-process FILTER_GENES {
-    tag "$meta.id"
-    label "process_single"
+process SCAN_MOTIFS {
+    tag "${meta.motif}"
+    label 'process_low'
 
     conda "conda-forge::mulled-v2-2076f4a3fb468a04063c9e6b7747a630abb457f6==fccb0c41a243c639e11dd1be7b74f563e624fcca-0"
     container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
@@ -8,18 +8,21 @@ process FILTER_GENES {
         'biocontainers/mulled-v2-2076f4a3fb468a04063c9e6b7747a630abb457f6:fccb0c41a243c639e11dd1be7b74f563e624fcca-0' }"
 
     input:
-    tuple val(meta), path(counts)
-    tuple val(meta2), path(tpms)
-    val(min_count)
-    val(min_tpm)
+        tuple val(meta), path(motif_file), path(sequence_file)
 
     output:
-    tuple val(meta), path("*.counts_filtered.tsv")  , emit: counts
-    tuple val(meta), path("*.tpm_filtered.tsv")     , emit: tpms
-    tuple val(meta), path("*.genes_filtered.txt")   , emit: genes
-
-    path  "versions.yml"                            , emit: versions
+        tuple val(meta), path("fimo_${meta.motif}"), emit: results
+        path "versions.yml",                         emit: versions
 
     script:
-    template "filter_genes.py"
+    threshold = task.ext.threshold ?: 1e-4
+    pseudocount = task.ext.pseudocount ?: 0.1
+    template "scan_motifs.py"
+
+    stub:
+    """
+    mkdir fimo_${meta.motif}
+    touch fimo_${meta.motif}/fimo.gff
+    touch fimo_${meta.motif}/fimo.tsv
+    """
 }
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+import math
+import multiprocessing
+import numpy as np
+import os
+import platform
+
+def format_yaml_like(data: dict, indent: int = 0) -> str:
+    """Formats a dictionary to a YAML-like string.
+
+    Args:
+        data (dict): The dictionary to format.
+        indent (int): The current indentation level.
+
+    Returns:
+        str: A string formatted as YAML.
+    """
+    yaml_str = ""
+    for key, value in data.items():
+        spaces = "  " * indent
+        if isinstance(value, dict):
+            yaml_str += f"{spaces}{key}:\\n{format_yaml_like(value, indent + 1)}"
+        else:
+            yaml_str += f"{spaces}{key}: {value}\\n"
+    return yaml_str
+
+ALPHABET = "ACGT"
+UNKNOWN = 4
+# Scaled scores of all motif columns together span this many integer steps
+SCALE_RANGE = 1000
+BLOCK_SIZE = 1 << 20
+
+TSV_HEADER = 'motif_id\\tmotif_alt_id\\tsequence_name\\tstart\\tstop\\tstrand\\tscore\\tp-value\\tq-value\\tmatched_sequence'
+
+def encode_fasta(path_fasta: str, path_codes: str) -> tuple:
+    """Encodes a FASTA file as one uint8 array (A=0, C=1, G=2, T=3, other=4) written to disk.
+
+    Records are separated by one unknown letter, so no window spans two sequences.
+
+    Args:
+        path_fasta (str): Path to the FASTA file.
+        path_codes (str): Path to the raw uint8 output.
+
+    Returns:
+        tuple: Record names and the offset of every record in the array.
+    """
+    table = bytearray([UNKNOWN]) * 256
+    for code, letter in enumerate(ALPHABET):
+        table[ord(letter)] = table[ord(letter.lower())] = code
+    table = bytes(table)
+
+    names, offsets = [], []
+    position = 0
+    with open(path_fasta, "rb") as f, open(path_codes, "wb") as out:
+        for line in f:
+            if line.startswith(b">"):
+                if names:
+                    out.write(bytes([UNKNOWN]))
+                    position += 1
+                names.append(line[1:].split()[0].decode())
+                offsets.append(position)
+                continue
+            line = line.rstrip()
+            out.write(line.translate(table))
+            position += len(line)
+        out.write(bytes([UNKNOWN]))
+    return names, np.array(offsets, dtype=np.int64)
+
+def read_motifs(path_meme: str, pseudocount: float) -> tuple:
+    """Reads the background and the letter-probability matrices of a MEME file.
+
+    Args:
+        path_meme (str): Path to the MEME file.
+        pseudocount (float): Pseudocount added to every motif column, spread by the background.
+
+    Returns:
+        tuple: Background frequencies and a list of (motif_id, motif_alt_id, probabilities).
+    """
+    with open(path_meme) as f:
+        lines = [line.strip() for line in f]
+
+    background = np.full(4, 0.25)
+    motifs = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("Background letter frequencies"):
+            values = lines[i + 1].split()
+            frequencies = dict(zip(values[::2], map(float, values[1::2])))
+            background = np.array([frequencies[letter] for letter in ALPHABET])
+            background /= background.sum()
+        elif line.startswith("MOTIF"):
+            fields = line.split()
+            motif_id = fields[1]
+            motif_alt_id = fields[2] if len(fields) > 2 else ""
+            while not lines[i].startswith("letter-probability matrix"):
+                i += 1
+            header = lines[i].replace("= ", "=").split()
+            options = dict(field.split("=") for field in header if "=" in field)
+            width, nsites = int(options["w"]), float(options.get("nsites", 20))
+            rows = np.array([lines[i + 1 + j].split() for j in range(width)], dtype=float)
+            rows = (rows * nsites + pseudocount * background) / (nsites + pseudocount)
+            motifs.append((motif_id, motif_alt_id, rows))
+            i += width
+        i += 1
+    return background, motifs
+
+def score_distribution(scaled: np.ndarray, background: np.ndarray) -> np.ndarray:
+    """P-value of every total scaled score, from the exact score distribution under the background.
+
+    Args:
+        scaled (np.ndarray): Integer score matrix (width x 4), non-negative.
+        background (np.ndarray): Background letter frequencies.
+
+    Returns:
+        np.ndarray: P(score >= s) for every s from 0 to the maximal score.
+    """
+    distribution = np.ones(1)
+    for row in scaled:
+        shifted = np.zeros(len(distribution) + row.max())
+        for letter in range(4):
+            shifted[row[letter]:row[letter] + len(distribution)] += background[letter] * distribution
+        distribution = shifted
+    return np.minimum(np.cumsum(distribution[::-1])[::-1], 1.0)
+
+def window_scores(codes: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Sums a (width x 5) matrix over all windows of the encoded sequence."""
+    width = len(matrix)
+    n_windows = len(codes) - width + 1
+    scores = np.zeros(n_windows, dtype=matrix.dtype)
+    for i in range(width):
+        scores += matrix[i][codes[i:i + n_windows]]
+    return scores
+
+def scan_motif(args: tuple) -> tuple:
+    """Scans one motif over both strands of all sequences.
+
+    Args:
+        args (tuple): Motif ID, alternative ID, probabilities, background and p-value threshold.
+
+    Returns:
+        tuple: Motif IDs, the hits as (position, strand, raw score, p-value) arrays, the
+            q-value of every hit and its matched sequence.
+    """
+    motif_id, motif_alt_id, probabilities, background, threshold = args
+    codes = np.memmap(PATH_CODES, dtype=np.uint8, mode="r")
+    width = len(probabilities)
+
+    log_odds = np.log2(probabilities / background)
+    row_min = log_odds.min(axis=1, keepdims=True)
+    scale = SCALE_RANGE / max((log_odds.max(axis=1, keepdims=True) - row_min).sum(), 1e-12)
+    scaled = np.rint((log_odds - row_min) * scale).astype(np.int64)
+    p_values = score_distribution(scaled, background)
+
+    # Lowest scaled score with a p-value below the threshold
+    passing = np.nonzero(p_values < threshold)[0]
+    min_hit_score = passing[0] if len(passing) else len(p_values)
+
+    # The unknown letter invalidates every window containing it
+    strands = []
+    for strand, matrix in (("+", scaled), ("-", scaled[::-1, ::-1])):
+        strands.append((strand, np.hstack([matrix, np.full((width, 1), -(1 << 40))])))
+
+    histogram = np.zeros(len(p_values), dtype=np.int64)
+    hits = []
+    for block_start in range(0, max(len(codes) - width + 1, 0), BLOCK_SIZE):
+        block = np.asarray(codes[block_start:block_start + BLOCK_SIZE + width - 1])
+        for strand, matrix in strands:
+            scores = window_scores(block, matrix)
+            valid = scores >= 0
+            histogram += np.bincount(scores[valid], minlength=len(p_values))
+            positions = np.nonzero(scores >= min_hit_score)[0]
+            hits.append((positions + block_start, np.full(len(positions), strand == "+"), scores[positions]))
+
+    positions = np.concatenate([h[0] for h in hits])
+    forward = np.concatenate([h[1] for h in hits])
+    scores = np.concatenate([h[2] for h in hits])
+
+    # Benjamini-Hochberg q-values over all scored windows, from the score histogram
+    n_tests = histogram.sum()
+    rank = np.cumsum(histogram[::-1])[::-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fdr = np.where(histogram > 0, p_values * n_tests / rank, np.inf)
+    q_values = np.minimum(np.minimum.accumulate(fdr), 1.0)
+
+    # Raw log-odds scores and matched sequences of the hits
+    windows = positions[:, None] + np.arange(width)
+    letters = np.asarray(codes)[windows] if len(positions) else np.zeros((0, width), dtype=np.uint8)
+    letters = np.where(forward[:, None], letters, 3 - letters[:, ::-1])
+    raw_scores = log_odds[np.arange(width), letters].sum(axis=1)
+    matched = ["".join(ALPHABET[c] for c in row) for row in letters]
+
+    return motif_id, motif_alt_id, positions, forward, raw_scores, p_values[scores], q_values[scores], matched
+
+def init_worker(path_codes: str):
+    global PATH_CODES
+    PATH_CODES = path_codes
+
+threshold = float("${threshold}")
+pseudocount = float("${pseudocount}")
+output_dir = "fimo_${meta.motif}"
+
+# Encode the sequences once, every worker maps the same file
+names, offsets = encode_fasta("${sequence_file}", "sequences.u8")
+
+background, motifs = read_motifs("${motif_file}", pseudocount)
+
+with multiprocessing.Pool(int("${task.cpus}"), initializer=init_worker, initargs=("sequences.u8",)) as pool:
+    results = pool.map(scan_motif, [(motif_id, motif_alt_id, probabilities, background, threshold)
+                                    for motif_id, motif_alt_id, probabilities in motifs])
+
+# Write FIMO compatible output, hits of every motif sorted by p-value
+os.makedirs(output_dir, exist_ok=True)
+with open(f"{output_dir}/fimo.tsv", "w") as tsv, open(f"{output_dir}/fimo.gff", "w") as gff:
+    tsv.write(TSV_HEADER + "\\n")
+    gff.write("##gff-version 3\\n")
+    for motif_id, motif_alt_id, positions, forward, raw_scores, p_values, q_values, matched in results:
+        records = np.searchsorted(offsets, positions, side="right") - 1
+        order = np.lexsort((positions, -raw_scores, p_values))
+        for n, hit in enumerate(order, start=1):
+            name = names[records[hit]]
+            start = positions[hit] - offsets[records[hit]] + 1
+            stop = start + len(matched[hit]) - 1
+            strand = "+" if forward[hit] else "-"
+            p_value, q_value = f"{p_values[hit]:.3g}", f"{q_values[hit]:.3g}"
+            tsv.write(f"{motif_id}\\t{motif_alt_id}\\t{name}\\t{start}\\t{stop}\\t{strand}\\t{raw_scores[hit]:.6g}"
+                        f"\\t{p_value}\\t{q_value}\\t{matched[hit]}\\n")
+            gff_score = min(1000, round(-10 * math.log10(max(p_values[hit], 1e-300)), 1))
+            gff.write(f"{name}\\tfimo\\tnucleotide_motif\\t{start}\\t{stop}\\t{gff_score}\\t{strand}\\t.\\t"
+                        f"Name={motif_id}_{name}{strand};Alias={motif_alt_id};ID={motif_id}-{n}-{name};"
+                        f"pvalue={p_value};qvalue={q_value};sequence={matched[hit]};\\n")
+
+os.remove("sequences.u8")
+
+# Create version file
+versions = {
+    "${task.process}" : {
+        "python": platform.python_version(),
+        "numpy": np.__version__
+    }
+}
+
+with open("versions.yml", "w") as f:
+    f.write(format_yaml_like(versions))
@@ -0,0 +1,26 @@
+process SPLIT_FASTA {
+    tag "$meta.id"
+    label 'process_single'
+
+    conda 'conda-forge::python==3.9.5'
+    container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
+        'https://depot.galaxyproject.org/singularity/python:3.9--1':
+        'biocontainers/python:3.9--1' }"
+
+    input:
+        tuple val(meta), path(fasta)
+        val(chunks)
+
+    output:
+        tuple val(meta), path("chunks/*.fa"), emit: fasta
+        path "versions.yml",                  emit: versions
+
+    script:
+    template "split_fasta.py"
+
+    stub:
+    """
+    mkdir chunks
+    touch chunks/chunk_0000.fa
+    """
+}
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import heapq
+import os
+import platform
+
+def format_yaml_like(data: dict, indent: int = 0) -> str:
+    """Formats a dictionary to a YAML-like string.
+
+    Args:
+        data (dict): The dictionary to format.
+        indent (int): The current indentation level.
+
+    Returns:
+        str: A string formatted as YAML.
+    """
+    yaml_str = ""
+    for key, value in data.items():
+        spaces = "  " * indent
+        if isinstance(value, dict):
+            yaml_str += f"{spaces}{key}:\\n{format_yaml_like(value, indent + 1)}"
+        else:
+            yaml_str += f"{spaces}{key}: {value}\\n"
+    return yaml_str
+
+def index_fasta(path: str) -> list:
+    """Finds the byte range of every record of a FASTA file in one pass.
+
+    Args:
+        path (str): Path to the FASTA file.
+
+    Returns:
+        list: (start, end) byte offsets of every record, in file order.
+    """
+    starts = []
+    position = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.startswith(b'>'):
+                starts.append(position)
+            position += len(line)
+    return list(zip(starts, starts[1:] + [position]))
+
+chunks = int("${chunks}")
+if chunks < 1:
+    raise ValueError("The number of chunks must be at least 1.")
+
+records = index_fasta("${fasta}")
+
+# Assign the largest records first to the chunk with the fewest bytes so far
+assignment = [0] * len(records)
+loads = [(0, chunk) for chunk in range(min(chunks, len(records)) or 1)]
+for record in sorted(range(len(records)), key=lambda record: records[record][0] - records[record][1]):
+    load, chunk = heapq.heappop(loads)
+    assignment[record] = chunk
+    start, end = records[record]
+    heapq.heappush(loads, (load + end - start, chunk))
+
+# Copy the records in file order, so every chunk keeps the input order
+os.mkdir('chunks')
+outputs = [open(f'chunks/chunk_{chunk:04d}.fa', 'wb') for chunk in range(len(loads))]
+with open("${fasta}", 'rb') as f:
+    for (start, end), chunk in zip(records, assignment):
+        f.seek(start)
+        outputs[chunk].write(f.read(end - start))
+for output in outputs:
+    output.close()
+
+# Create version file
+versions = {
+    "${task.process}" : {
+        "python": platform.python_version()
+    }
+}
+
+with open("versions.yml", "w") as f:
+    f.write(format_yaml_like(versions))
@@ -9,11 +9,14 @@ process FETCH_JASPAR {
 
     input:
     val(taxon_id)
+    tuple val(meta), path(database, stageAs: "jaspar_db/*")
 
     output:
     path("motifs.jaspar"), emit: motifs
     path "versions.yml"  , emit: versions
 
     script:
+    release = task.ext.release ?: "JASPAR2024"
+    jaspar_db = database ?: ""
     template "fetch_jaspar.py"
 }
@@ -23,16 +23,64 @@ def format_yaml_like(data: dict, indent: int = 0) -> str:
             yaml_str += f"{spaces}{key}: {value}\\n"
     return yaml_str
 
-jdb = jaspardb(release='JASPAR2024')
+BASES = ["A", "C", "G", "T"]
 
-motifs = jdb.fetch_motifs(species=int("$taxon_id"))
+def read_jaspar(path: str) -> list:
+    """Reads a JASPAR flat file.
 
-with open("motifs.jaspar", "w+") as f:
-    for motif in motifs:
-        f.write(f">{motif.matrix_id} {motif.name.upper()}\\n")
-        for base in ["A", "C", "G", "T"]:
-            f.write(f"{base} [ {' '.join([str(int(x)) for x in motif.counts[base]])} ]\\n")
-        f.write("\\n")
+    Args:
+        path (str): Path to the JASPAR file.
+
+    Returns:
+        list: Motifs as (matrix ID, name, counts per base).
+    """
+    motifs = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith(">"):
+                fields = line[1:].split()
+                motifs.append((fields[0], fields[1] if len(fields) > 1 else fields[0], {}))
+            elif line and motifs:
+                base, values = line.split(None, 1)
+                motifs[-1][2][base] = [float(x) for x in values.strip("[] ").split()]
+    return motifs
+
+def fetch_motifs(taxon_id: int, release: str, database: str) -> list:
+    """Fetches the CORE motifs of a taxon, from a local JASPAR database if given.
+
+    Args:
+        taxon_id (int): NCBI taxonomy ID.
+        release (str): JASPAR release shipped with pyjaspar.
+        database (str): Local JASPAR SQLite or flat file, empty to use the release.
+
+    Returns:
+        list: Motifs as (matrix ID, name, counts per base).
+    """
+    if database:
+        with open(database, "rb") as f:
+            is_sqlite = f.read(16) == b"SQLite format 3\\x00"
+        if not is_sqlite:
+            # Flat files carry no taxonomy, all of their motifs are used
+            return read_jaspar(database)
+        jdb = jaspardb(sqlite_db_path=database)
+    else:
+        jdb = jaspardb(release=release)
+    return [(motif.matrix_id, motif.name, motif.counts) for motif in jdb.fetch_motifs(species=taxon_id)]
+
+def write_jaspar(path: str, motifs: list):
+    """Writes motifs as a JASPAR flat file, with upper-case names."""
+    lines = []
+    for matrix_id, name, counts in motifs:
+        lines.append(f">{matrix_id} {name.upper()}\\n")
+        for base in BASES:
+            lines.append(f"{base} [ {' '.join([str(int(x)) for x in counts[base]])} ]\\n")
+        lines.append("\\n")
+    with open(path, "w") as f:
+        f.write("".join(lines))
+
+motifs = fetch_motifs(int("$taxon_id"), "${release}", "${jaspar_db}")
+write_jaspar("motifs.jaspar", motifs)
 
 # Create version file
 versions = {
@@ -0,0 +1,27 @@
+process PREPARE_MOTIFS {
+    tag "$meta.id"
+    label "process_single"
+
+    conda "bioconda:bioconductor-universalmotif==1.20.0--r43hf17093f_0"
+    container "${ workflow.containerEngine == 'singularity' && !task.ext.singularity_pull_docker_container ?
+        'https://depot.galaxyproject.org/singularity/bioconductor-universalmotif:1.20.0--r43hf17093f_0':
+        'biocontainers/bioconductor-universalmotif:1.20.0--r43hf17093f_0' }"
+
+    input:
+    tuple val(meta), path(in_file), val(in_type)
+    tuple val(meta2), path(tfs)
+    val(out_types)
+
+    output:
+    tuple val(meta), path("${meta.id}.converted.meme")    , emit: meme     , optional: true
+    tuple val(meta), path("${meta.id}.converted.transfac"), emit: transfac , optional: true
+    tuple val(meta), path("${meta.id}.converted.jaspar")  , emit: jaspar   , optional: true
+    tuple val(meta), path("${meta.id}.converted.homer")   , emit: homer    , optional: true
+    tuple val(meta), path("${meta.id}.filtered.RDS")      , emit: universal, optional: true
+    path "versions.yml"                                   , emit: versions
+
+    script:
+    prefix = "${meta.id}"
+    out_type_list = out_types instanceof List ? out_types.join(",") : out_types
+    template "prepare_motifs.R"
+}
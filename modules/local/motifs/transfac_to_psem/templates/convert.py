@@ -37,8 +37,55 @@ at_content = 1 - gc_content
 slope = 0.584
 intercept = -5.66
 
-def write_pwm(f, matrix, name, ma_id):
-    matrix = matrix + pseudocount
+decimals = 6
+
+def read_transfac(path: str) -> tuple:
+    """Reads all count matrices of a TRANSFAC file into one stacked array.
+
+    Args:
+        path (str): Path to the TRANSFAC file.
+
+    Returns:
+        tuple: Motif IDs, motif names, the offset of every motif in the stacked
+            rows (plus the total row count) and the stacked counts (rows x ACGT).
+    """
+    ids, names, offsets, rows = [], [], [0], []
+    cur_id, cur_name, cur_rows = None, None, 0
+    with open(path, 'r') as f_in:
+        for line in f_in:
+            splitted = line.strip().split()
+            prefix = splitted[0]
+
+            if prefix in ["//"]: continue
+            elif prefix == "P0":
+                if splitted[A+1] != "A" or splitted[C+1] != "C" or splitted[G+1] != "G" or splitted[T+1] != "T":
+                    raise ValueError("Invalid transfac file")
+            elif prefix == "ID":
+                cur_id = splitted[1]
+            elif prefix == "NA":
+                cur_name = splitted[1]
+            elif prefix.isnumeric():
+                rows.append([int(splitted[i+1]) for i in base_order])
+                cur_rows += 1
+            elif prefix == "XX":
+                if not cur_id or not cur_name or not cur_rows:
+                    raise ValueError("Invalid transfac file")
+                ids.append(cur_id)
+                names.append(cur_name)
+                offsets.append(offsets[-1] + cur_rows)
+                cur_id, cur_name, cur_rows = None, None, 0
+
+    # Rows of an unterminated trailing motif are dropped
+    counts = np.array(rows[:offsets[-1]], dtype=np.int64).reshape(-1, 4)
+    return ids, names, offsets, counts
+
+def energy_pwm(counts: np.ndarray) -> np.ndarray:
+    """Converts count rows to PSEM energies, all motifs in one pass.
+
+    Every row is normalized on its own, so stacked motifs give the same values
+    as converting them one by one.
+    """
+    matrix = counts + pseudocount
     matrix = matrix / matrix.sum(axis=1, keepdims=True)
 
     maxGC = np.maximum(matrix[:, G], matrix[:, C])
@@ -55,37 +102,20 @@ def write_pwm(f, matrix, name, ma_id):
                     np.log((other / other_content) * (active_content / matrix[:, i])) / lamda,
                     np.log(active / matrix[:, i]) / lamda
                 )
-
-    lnR0 = len(matrix) * slope + intercept
-
-    decimals = 6
-    f.write(f">{ma_id}\\t{name}\\tlnR0: {(round(lnR0, decimals))}\\n")
-    for row in pwm:
-        f.write("\\t".join([f"{round(x, decimals)}" for x in row]) + "\\n")
-
-
-with open(transfac_path, 'r') as f_in, open("${meta.id}.psem", "w") as f_out:
-    cur_id, cur_name, cur_matrix = None, None, []
-    for line in f_in:
-        splitted = line.strip().split()
-        prefix = splitted[0]
-
-        if prefix in ["//"]: continue
-        elif prefix == "P0":
-            if splitted[A+1] != "A" or splitted[C+1] != "C" or splitted[G+1] != "G" or splitted[T+1] != "T":
-                raise ValueError("Invalid transfac file")
-        elif prefix == "ID":
-            cur_id = splitted[1]
-        elif prefix == "NA":
-            cur_name = splitted[1]
-        elif prefix.isnumeric():
-            cur_matrix.append([int(splitted[i+1]) for i in base_order])
-        elif prefix == "XX":
-            if not cur_id or not cur_name or not cur_matrix:
-                raise ValueError("Invalid transfac file")
-            matrix = np.array(cur_matrix)
-            write_pwm(f_out, matrix, cur_name, cur_id)
-            cur_id, cur_name, cur_matrix = None, None, []
+    return pwm
+
+def write_psem(f, ids: list, names: list, offsets: list, pwm: np.ndarray):
+    """Writes all motifs, rounding in bulk and formatting the rows with one join each."""
+    values = np.round(pwm, decimals).tolist()
+    rows = ["\\t".join(map(repr, row)) + "\\n" for row in values]
+    for ma_id, name, start, end in zip(ids, names, offsets, offsets[1:]):
+        lnR0 = (end - start) * slope + intercept
+        f.write(f">{ma_id}\\t{name}\\tlnR0: {(round(lnR0, decimals))}\\n")
+        f.writelines(rows[start:end])
+
+ids, names, offsets, counts = read_transfac(transfac_path)
+with open("${meta.id}.psem", "w") as f_out:
+    write_psem(f_out, ids, names, offsets, energy_pwm(counts))
 
 # Create version file
 versions = {
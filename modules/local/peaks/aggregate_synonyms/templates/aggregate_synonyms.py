@@ -1,7 +1,14 @@
 #!/usr/bin/env python3
 
+import os
 import pandas as pd
 import platform
+import shutil
+import sys
+
+# bin/ is on the PATH of the task, not on the Python path
+sys.path.insert(0, os.path.dirname(shutil.which("gene_ids.py")))
+from gene_ids import build_symbol_lookup, map_symbols
 
 def format_yaml_like(data: dict, indent: int = 0) -> str:
     """Formats a dictionary to a YAML-like string.
@@ -31,8 +38,7 @@ df_genes = pd.read_csv("$gene_map", sep="\\t", index_col=0)
 
 df_affinities = df_affinities.drop(["NumPeaks", "AvgPeakDistance", "AvgPeakSize"], axis=1)
 
-conversion_dict = df_genes["gene_name"].to_dict()
-df_affinities.index = df_affinities.index.map(conversion_dict).str.upper()
+df_affinities.index = map_symbols(df_affinities.index, build_symbol_lookup(df_genes))
 
 # Aggregate across genes
 df_affinities = df_affinities.groupby(df_affinities.index).agg(agg_method)
@@ -11,10 +11,11 @@ process TF_TG_SCORE {
     tuple val(meta), path(differential), path(affinities), path(regression_coefficients)
 
     output:
-    tuple val(meta), path("*.score.tsv"), emit: score
+    tuple val(meta), path("*.score.${score_format}"), emit: score
 
-    path  "versions.yml"                , emit: versions
+    path  "versions.yml"                           , emit: versions
 
     script:
+    score_format = task.ext.score_format ?: "tsv"
     template "tf_tg_score.py"
 }
@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
 
+import numpy as np
+import os
 import pandas as pd
 import platform
+import shutil
+import sys
+
+# bin/ is on the PATH of the task, not on the Python path
+sys.path.insert(0, os.path.dirname(shutil.which("gene_ids.py")))
+from gene_ids import remove_version
 
 def format_yaml_like(data: dict, indent: int = 0) -> str:
     """Formats a dictionary to a YAML-like string.
@@ -22,16 +30,17 @@ def format_yaml_like(data: dict, indent: int = 0) -> str:
             yaml_str += f"{spaces}{key}: {value}\\n"
     return yaml_str
 
-def remove_version(gene_id):
-    return gene_id.split(".")[0]
+score_format = "$score_format"
+if score_format not in ["tsv", "npz"]:
+    raise ValueError("Invalid score format. Must be one of 'tsv', 'npz'.")
 
 df_differential = pd.read_csv("$differential".replace("\\\\", ""), sep='\\t', index_col=0)
 df_affinities = pd.read_csv("$affinities".replace("\\\\", ""), sep='\\t', index_col=0)
 df_coefficients = pd.read_csv("$regression_coefficients".replace("\\\\", ""), sep='\\t', index_col=0)
 
 # Remove version from gene ids
-df_differential.index = df_differential.index.map(remove_version)
-df_affinities.index = df_affinities.index.map(remove_version)
+df_differential.index = remove_version(df_differential.index)
+df_affinities.index = remove_version(df_affinities.index)
 
 # Make sure genes are in common between the differential expression and affinities files
 gene_intersection = df_differential.index.intersection(df_affinities.index)
@@ -59,13 +68,26 @@ result = (df_affinities
 assert not result.empty, "No TF-TG scores were calculated"
 
 # Save the result
-result.to_csv("${meta.id}.score.tsv", sep='\\t')
+if score_format == "npz":
+    # Compact float32 matrix without the all-zero TF columns (e.g. zero regression coefficients),
+    # their names are kept so readers can restore them
+    values = result.to_numpy(dtype=np.float32)
+    kept = (values != 0).any(axis=0)
+    np.savez("${meta.id}.score.npz",
+             values=values[:, kept],
+             kept=kept,
+             index=result.index.to_numpy(dtype=str),
+             columns=result.columns.to_numpy(dtype=str),
+             index_name=np.array(result.index.name or ""))
+else:
+    result.to_csv("${meta.id}.score.tsv", sep='\\t')
 
 # Create version file
 versions = {
     "${task.process}" : {
         "python": platform.python_version(),
-        "pandas": pd.__version__
+        "pandas": pd.__version__,
+        "numpy": np.__version__
     }
 }
 
@@ -1,73 +1,317 @@
-const getRanking = function (inputDcgs, assays) {
-  const scores = Object.entries(inputDcgs).reduce(function (acc, [value, dcgs]) {
-    if (assays.some((assay) => Object.keys(dcgs).includes(assay))) {
-      acc[value] =
-        assays.reduce(function (acc, assay) {
-          return acc + (dcgs[assay] || 0);
-        }, 0) / assays.length;
-    } else {
-      acc[value] = -1;
+const reportData = {};
+const pendingReportData = {};
+
+// Called by the data/*.js side files written by the report builder
+const registerReportData = function (name, data) {
+  reportData[name] = data;
+  (pendingReportData[name] || []).forEach((resolve) => resolve(data));
+  delete pendingReportData[name];
+};
+
+// Side files are plain scripts, so they also load when the report is opened from disk
+const loadReportData = function (name) {
+  if (name in reportData) {
+    return Promise.resolve(reportData[name]);
+  }
+  return new Promise(function (resolve) {
+    if (name in pendingReportData) {
+      pendingReportData[name].push(resolve);
+      return;
     }
-    return acc;
-  }, {});
+    pendingReportData[name] = [resolve];
+    const script = document.createElement("script");
+    script.src = `data/${name}.js`;
+    document.head.appendChild(script);
+  });
+};
 
-  const order = Object.keys(scores).sort(function (a, b) {
+const decodeFloat32 = function (base64) {
+  const binary = atob(base64);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return new Float32Array(bytes.buffer);
+};
+
+// Mean over the active assays, missing values count as 0. Entries without a value in any active assay get -1.
+const getScores = function (count, columns, valueAt, nAssays) {
+  const scores = new Float64Array(count);
+  for (let k = 0; k < count; k++) {
+    let sum = 0;
+    let present = false;
+    for (const column of columns) {
+      const value = valueAt(column, k);
+      if (value !== null && value !== undefined && !Number.isNaN(value)) {
+        sum += value;
+        present = true;
+      }
+    }
+    scores[k] = present ? sum / nAssays : -1;
+  }
+  return scores;
+};
+
+const getOrder = function (scores) {
+  return Array.from(scores.keys()).sort(function (a, b) {
     return scores[b] - scores[a];
   });
+};
+
+// Order of the entries of a columnar table ({index, assays, values}) over the active assays
+const getPrimaryOrder = function (table, assays) {
+  const columns = assays.filter((assay) => assay in table.values).map((assay) => table.values[assay]);
+  const scores = getScores(table.index.length, columns, (column, k) => column[k], assays.length);
+  return getOrder(scores);
+};
+
+const getChunkColumns = function (chunk, assays) {
+  chunk.decoded = chunk.decoded || {};
+  return assays
+    .filter((assay) => assay in chunk.values)
+    .map(function (assay) {
+      if (!(assay in chunk.decoded)) {
+        chunk.decoded[assay] = decodeFloat32(chunk.values[assay]);
+      }
+      return chunk.decoded[assay];
+    });
+};
+
+// Edges are sharded by primary, only the chunk holding the primary is loaded
+const loadEdges = async function (name, primary) {
+  const index = await loadReportData(`${name}/index`);
+  index.positions = index.positions || new Map(index.primaries.map((primary, i) => [primary, i]));
 
-  const ranks = order.reduce(function (acc, primary, index) {
-    acc[primary] = index;
-    return acc;
-  }, {});
+  const position = index.positions.get(primary);
+  if (position === undefined) {
+    return null;
+  }
 
-  return ranks;
+  const chunkId = String(Math.floor(position / index.chunk_size)).padStart(4, "0");
+  const chunk = await loadReportData(`${name}/${chunkId}`);
+  return { secondaries: index.secondaries, chunk: chunk, row: position % index.chunk_size };
 };
 
-const getSecondaryRanking = function (activeAssays, secondary_ranking) {
-  return Object.entries(secondary_ranking).reduce(function (acc, [primary, currentRanking]) {
-    return { ...acc, [primary]: getRanking(currentRanking, activeAssays) };
-  }, {});
+// Top secondaries of one primary, secondaries without a value in the active assays are left out
+const getSecondaryRanking = function (edges, assays, topK) {
+  if (edges === null) {
+    return [];
+  }
+
+  const width = edges.secondaries.length;
+  const offset = edges.row * width;
+  const scores = getScores(width, getChunkColumns(edges.chunk, assays), (column, k) => column[offset + k], assays.length);
+
+  return getOrder(scores)
+    .slice(0, topK)
+    .filter((k) => scores[k] >= 0)
+    .map((k) => edges.secondaries[k]);
+};
+
+const drawBarPlot = function (element, y, x) {
+  Plotly.newPlot(
+    element,
+    [
+      {
+        y: y,
+        x: x,
+        type: "bar",
+        orientation: "h",
+      },
+    ],
+    {
+      margin: { t: 0 },
+    },
+    { responsive: true },
+  );
+};
+
+const drawDifferentialPlots = function (container, pairings, log2fc) {
+  const divider = document.createElement("div");
+  divider.className = "divider";
+  const heading = document.createElement("h2");
+  heading.textContent = "Log2fc";
+  const plot = document.createElement("div");
+  container.append(divider, heading, plot);
+  drawBarPlot(plot, pairings, log2fc);
+};
+
+const getAssayColor = function (dcg) {
+  if (dcg === null || dcg === undefined) {
+    return "";
+  } else if (dcg >= 2 / 3) {
+    return "label-success";
+  } else if (dcg >= 1 / 3) {
+    return "label-warning";
+  }
+  return "label-error";
+};
+
+const createElement = function (tag, className, text) {
+  const element = document.createElement(tag);
+  if (className) {
+    element.className = className;
+  }
+  if (text !== undefined) {
+    element.textContent = text;
+  }
+  return element;
+};
+
+const createCard = function (primary, assays, dcgs) {
+  const card = createElement("div", "card primary-card");
+  card.id = `primary-${primary}`;
+  card.style.width = "100%";
+
+  const accordion = createElement("div", "accordion");
+  const toggle = createElement("input");
+  toggle.type = "checkbox";
+  toggle.id = `accordion-${primary.toLowerCase()}`;
+  toggle.name = "accordion-checkbox";
+  toggle.hidden = true;
+
+  const header = createElement("label", "accordion-header c-hand");
+  header.htmlFor = toggle.id;
+  const labels = createElement("div", "float-right");
+  labels.append(createElement("button", "btn btn-primary btn-sm", "Details"));
+  assays.forEach(function (assay) {
+    labels.append(createElement("span", `label label-rounded ${getAssayColor(dcgs[assay])}`, ` ${assay} `));
+  });
+  header.append(createElement("i", "icon icon-arrow-right mr-1"), ` ${primary} `, labels);
+
+  const body = createElement("div", "accordion-body");
+  body.style.overflow = "scroll";
+  const padding = createElement("div", "accordion-padding");
+  const title = createElement("h2", null, "Top target genes (");
+  const gProfilerLink = createElement("a", null, "g:Profiler");
+  gProfilerLink.id = `primary-${primary}-gprofiler`;
+  gProfilerLink.target = "_blank";
+  title.append(gProfilerLink, ")");
+  const secondaries = createElement("div");
+  secondaries.id = `primary-${primary}-secondaries`;
+  secondaries.style.display = "flex";
+  secondaries.style.flexWrap = "wrap";
+  padding.append(title, secondaries);
+  body.append(padding);
+
+  accordion.append(toggle, header, body);
+  card.append(accordion);
+  return card;
 };
 
-const initRanking = async function (primary_ranking, secondary_ranking) {
+const initRanking = async function (primaryName, edgesName, drawPlots, pageSize = 50) {
   const assayChips = Array.from(document.querySelectorAll('[id^="assay-"]'));
+  const cardContainer = document.getElementById("primary-cards");
+  const pagination = document.getElementById("pagination");
+  const filterPrimary = document.getElementById("filter-primary");
+  const primary_ranking = await loadReportData(primaryName);
+  const allAssays = assayChips.map((chip) => chip.textContent);
 
-  const updatePrimaryRanking = async function (activeAssays) {
-    const primaryRank = getRanking(primary_ranking, activeAssays);
+  const openPrimaries = new Set();
+  let orderedPrimaries = [];
+  let page = 0;
 
-    Object.entries(primaryRank).forEach(function ([primary, rank]) {
-      const primaryCard = document.getElementById(`primary-${primary}`);
-      primaryCard.style.order = rank;
-    });
+  const getActiveAssays = function () {
+    return assayChips
+      .filter(function (chip) {
+        return chip.classList.contains("active");
+      })
+      .map(function (chip) {
+        return chip.textContent;
+      });
+  };
+
+  const getDcgs = function (k) {
+    return allAssays.reduce(function (acc, assay) {
+      acc[assay] = assay in primary_ranking.values ? primary_ranking.values[assay][k] : null;
+      return acc;
+    }, {});
+  };
+
+  // Secondaries of a card are only loaded and ranked once it is opened
+  const updateSecondaryRanking = async function (primary, activeAssays) {
+    const edges = await loadEdges(edgesName, primary);
+    const showedSecondaries = getSecondaryRanking(edges, activeAssays, 31);
+
+    const container = document.getElementById(`primary-${primary}-secondaries`);
+    if (container === null) {
+      return;
+    }
+    container.replaceChildren(
+      ...showedSecondaries.map(function (secondary) {
+        const chip = createElement("span", "chip", secondary);
+        chip.id = `primary-${primary}-secondary-${secondary}`;
+        return chip;
+      }),
+    );
+
+    const gProfilerLink = `https://biit.cs.ut.ee/gprofiler/gost?query=${showedSecondaries.join("%0D")}`;
+    document.getElementById(`primary-${primary}-gprofiler`).href = gProfilerLink;
+  };
+
+  const openCard = function (card, primary) {
+    updateSecondaryRanking(primary, getActiveAssays());
+    if (drawPlots && !card.plotted) {
+      card.plotted = true;
+      drawPlots(primary, card.querySelector(".accordion-padding"));
+    }
   };
 
-  const updateSecondaryRanking = async function (activeAssays) {
-    const ranking = getSecondaryRanking(activeAssays, secondary_ranking);
-    for (const primary in ranking) {
-      const tgRank = ranking[primary];
-      const showedSecondaries = [];
-
-      Object.entries(tgRank).forEach(function ([secondary, rank]) {
-        const tgChip = document.getElementById(`primary-${primary}-secondary-${secondary}`);
-        tgChip.style.order = rank;
-        tgChip.style.display = rank <= 30 ? "inline-block" : "none";
-        if (rank <= 30) {
-          showedSecondaries.push(secondary);
+  const renderPage = function () {
+    const filter = filterPrimary.value.toLowerCase();
+    const visible = orderedPrimaries.filter((k) => primary_ranking.index[k].toLowerCase().includes(filter));
+    const pages = Math.max(1, Math.ceil(visible.length / pageSize));
+    page = Math.min(page, pages - 1);
+
+    cardContainer.replaceChildren(
+      ...visible.slice(page * pageSize, (page + 1) * pageSize).map(function (k) {
+        const primary = primary_ranking.index[k];
+        const card = createCard(primary, allAssays, getDcgs(k));
+        const toggle = card.querySelector('input[name="accordion-checkbox"]');
+        toggle.addEventListener("change", function () {
+          if (toggle.checked) {
+            openPrimaries.add(primary);
+            openCard(card, primary);
+          } else {
+            openPrimaries.delete(primary);
+          }
+        });
+        if (openPrimaries.has(primary)) {
+          toggle.checked = true;
+          setTimeout(() => openCard(card, primary));
+        }
+        return card;
+      }),
+    );
+
+    const pageItem = function (label, target, className) {
+      const item = createElement("li", `page-item ${className}`);
+      const link = createElement("a", null, label);
+      link.href = "#";
+      link.addEventListener("click", function (event) {
+        event.preventDefault();
+        if (target >= 0 && target < pages && target !== page) {
+          page = target;
+          renderPage();
         }
       });
+      item.append(link);
+      return item;
+    };
 
-      const gProfilerLink = `https://biit.cs.ut.ee/gprofiler/gost?query=${showedSecondaries.join("%0D")}`;
-      const gProfilerLinkElement = document.getElementById(`primary-${primary}-gprofiler`);
-      gProfilerLinkElement.href = gProfilerLink;
-    }
+    pagination.replaceChildren(
+      pageItem("Previous", page - 1, page === 0 ? "disabled" : ""),
+      pageItem(`${page + 1} / ${pages}`, page, "active"),
+      pageItem("Next", page + 1, page === pages - 1 ? "disabled" : ""),
+    );
   };
 
-  const allAssays = assayChips.map(function (chip) {
-    return chip.textContent;
-  });
+  const updatePrimaryRanking = function (activeAssays) {
+    orderedPrimaries = getPrimaryOrder(primary_ranking, activeAssays);
+    renderPage();
+  };
 
-  updatePrimaryRanking(allAssays);
-  updateSecondaryRanking(allAssays);
+  updatePrimaryRanking(getActiveAssays());
 
   assayChips.forEach(function (element) {
     element.addEventListener("click", function () {
@@ -91,27 +335,12 @@ const initRanking = async function (primary_ranking, secondary_ranking) {
         });
       }
 
-      const activeAssays = activeAssayChips.map(function (chip) {
-        return chip.textContent;
-      });
-
-      updatePrimaryRanking(activeAssays);
-      updateSecondaryRanking(activeAssays);
+      updatePrimaryRanking(getActiveAssays());
     });
   });
 
-  const filterPrimary = document.getElementById("filter-primary");
   filterPrimary.addEventListener("input", function () {
-    const filter = filterPrimary.value.toLowerCase();
-    const primaryCards = Array.from(document.querySelectorAll(".primary-card"));
-
-    primaryCards.forEach(function (card) {
-      const primary = card.id.replace("primary-", "");
-      if (primary.toLowerCase().includes(filter)) {
-        card.style.display = "block";
-      } else {
-        card.style.display = "none";
-      }
-    });
+    page = 0;
+    renderPage();
   });
 };
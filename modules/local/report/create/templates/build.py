@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 
 from jinja2 import Environment, PackageLoader, select_autoescape
+import base64
 import jinja2
+import numpy as np
 import os
 import shutil
 import json
 import pandas as pd
 import sys
-from collections import defaultdict
 
 module_app = os.path.abspath("$moduleDir/app")
 app_dir = "app"
@@ -29,6 +30,83 @@ env = Environment(
     autoescape=select_autoescape()
 )
 
+def table_columns(df: pd.DataFrame) -> dict:
+    """Columnar form of a table sorted by name, missing values as null."""
+    df = df.sort_index()
+    return {
+        "index": df.index.tolist(),
+        "assays": df.columns.tolist(),
+        "values": {column: df[column].astype(object).where(df[column].notna(), None).tolist()
+                   for column in df.columns}
+    }
+
+# Values per edge chunk file, chunks hold whole primaries
+CHUNK_VALUES = 1 << 20
+TOP_K = 31
+
+def stack_edges(tables: dict) -> tuple:
+    """Stacks TF x gene tables of all assays on the union of TFs and genes.
+
+    TFs and genes are sorted by name, so ties keep the order of the previous inline
+    JSON. Missing values are NaN.
+
+    Returns:
+        tuple: TFs, genes and a gene x TF float32 matrix per assay.
+    """
+    tfs = sorted(set(tf for table in tables.values() for tf in table.columns))
+    genes = sorted(set(gene for table in tables.values() for gene in table.index))
+    matrices = {
+        assay: table.reindex(index=genes, columns=tfs).to_numpy(dtype="<f4")
+        for assay, table in tables.items()
+    }
+    return tfs, genes, matrices
+
+def write_edges(name: str, primaries: list, secondaries: list, matrices: dict):
+    """Shards primary x secondary matrices into chunk files of whole primaries.
+
+    Every chunk stores each assay as a base64 encoded little-endian float32 array in
+    primary-major order. The index file lists the primaries, secondaries and chunk size.
+    """
+    chunk_size = max(1, CHUNK_VALUES // max(1, len(secondaries) * len(matrices)))
+    os.makedirs(os.path.join(out_dir, "data", name), exist_ok=True)
+    write_data(f"{name}/index", {"primaries": primaries, "secondaries": secondaries, "chunk_size": chunk_size})
+
+    for chunk, start in enumerate(range(0, len(primaries), chunk_size)):
+        write_data(f"{name}/{chunk:04d}", {
+            "primaries": primaries[start:start + chunk_size],
+            "values": {
+                assay: base64.b64encode(np.ascontiguousarray(matrix[start:start + chunk_size]).tobytes()).decode("ascii")
+                for assay, matrix in matrices.items()
+            }
+        })
+
+def top_secondaries(primaries: list, secondaries: list, matrices: dict, assays: list, k: int) -> dict:
+    """Top k secondaries of every primary with all assays active, scored like ranking.js."""
+    total = np.zeros((len(primaries), len(secondaries)))
+    present = np.zeros(total.shape, dtype=bool)
+    for assay in assays:
+        if assay in matrices:
+            values = matrices[assay].astype(float)
+            valid = ~np.isnan(values)
+            total += np.where(valid, values, 0)
+            present |= valid
+    scores = np.where(present, total / len(assays), -1)
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return {
+        primary: [secondaries[j] for j in order[i] if scores[i, j] >= 0]
+        for i, primary in enumerate(primaries)
+    }
+
+def write_data(name: str, data: dict):
+    """Writes a side file that registers its data with ranking.js when loaded.
+
+    A script instead of plain JSON keeps the report usable when opened from disk.
+    """
+    with open(os.path.join(out_dir, "data", f"{name}.js"), "w") as f:
+        f.write(f"registerReportData({json.dumps(name)}, ")
+        json.dump(data, f, separators=(",", ":"))
+        f.write(");\\n")
+
 rankings = {
     key: pd.read_csv(path, sep="\t", index_col=0, usecols=[0,1], names=["TF", key], header=0)
     for key, path in {
@@ -39,12 +117,6 @@ rankings = {
 
 df_ranking = pd.concat(rankings.values(), axis=1)
 
-# Remove all NaN values
-tf_ranking = {
-    tf: {assay: rank for assay, rank in ranks.items() if not pd.isna(rank)}
-    for tf, ranks in df_ranking.to_dict(orient="index").items()
-}
-
 assays = df_ranking.columns.tolist()
 sorted(assays, reverse=True)
 
@@ -56,40 +128,38 @@ raw_tf_tg_ranking = {
     }.items()
 }
 
-tf_tg_ranking = defaultdict(lambda: defaultdict(dict))
-tg_tf_ranking = defaultdict(lambda: defaultdict(dict))
-tg_ranking = defaultdict(lambda: defaultdict(int))
+# Gene-wise sum of the DCGs of all TFs, accumulated TF by TF as before
+tg_sums = {}
 for assay, ranking in raw_tf_tg_ranking.items():
-    for tf, genes in ranking.to_dict().items():
-        for gene, dcg in genes.items():
-            tf_tg_ranking[tf][gene][assay] = dcg
-            tg_tf_ranking[gene][tf][assay] = dcg
-            tg_ranking[gene][assay] += dcg
-
-df_tg_ranking = pd.DataFrame(tg_ranking).T.rank(ascending=False)
+    if len(ranking.columns) == 0:
+        continue
+    sums = np.zeros(len(ranking.index))
+    for tf in ranking.columns:
+        sums += ranking[tf].to_numpy(dtype=float)
+    tg_sums[assay] = pd.Series(sums, index=ranking.index)
+
+ranked_genes = list(dict.fromkeys(gene for assay in tg_sums for gene in raw_tf_tg_ranking[assay].index))
+df_tg_ranking = pd.DataFrame(tg_sums).reindex(ranked_genes).rank(ascending=False)
 df_tg_ranking = 1 - df_tg_ranking.apply(lambda x: x / x.count())
 
-tg_ranking = {
-    gene: {assay: rank for assay, rank in ranks.items() if not pd.isna(rank)}
-    for gene, ranks in df_tg_ranking.to_dict(orient="index").items()
-}
-
 raw_differential = {
-    pairing: pd.read_csv(path, sep="\t", index_col=0, header=0)["log2FoldChange"].to_dict()
+    pairing: pd.read_csv(path, sep="\t", index_col=0, header=0)["log2FoldChange"]
     for pairing, path in {
         path[:-len(".deseq2.results.tsv")]: path
         for path in "$differential".replace("\\\\", "").split(" ")
     }.items()
 }
 
-differential = defaultdict(dict)
-for pairing, values in raw_differential.items():
-    for gene, value in values.items():
-        differential[gene][pairing] = value
-
 pairings = list(raw_differential.keys())
 sorted(pairings)
 
+# Log2 fold changes are only plotted for the TFs
+df_differential = pd.DataFrame(raw_differential).reindex(df_ranking.index)
+tf_differential = {
+    tf: [None if pd.isna(value) else value for value in values]
+    for tf, values in zip(df_differential.index, df_differential[pairings].values.tolist())
+}
+
 tf = env.get_template("tf.html")
 tg = env.get_template("tg.html")
 network = env.get_template("network.html")
@@ -98,25 +168,28 @@ configuration = env.get_template("configuration.html")
 styles = env.get_template("styles.css")
 ranking_js = env.get_template("ranking.js")
 
-os.makedirs(out_dir, exist_ok=True)
+# Rankings are written once as columnar side files, the pages load them on demand
+os.makedirs(os.path.join(out_dir, "data"), exist_ok=True)
+write_data("tf_ranking", table_columns(df_ranking))
+write_data("tg_ranking", table_columns(df_tg_ranking))
+
+# TF->TG and TG->TF edges are sharded, a card only loads the chunk of its primary
+tfs, genes, matrices = stack_edges(raw_tf_tg_ranking)
+tf_matrices = {assay: matrix.T for assay, matrix in matrices.items()}
+write_edges("tf_tg", tfs, genes, tf_matrices)
+write_edges("tg_tf", genes, tfs, matrices)
+write_data("tf_tg/top", top_secondaries(tfs, genes, tf_matrices, assays, TOP_K))
+
 with open(os.path.join(out_dir, "index.html"), "w") as f:
-    f.write(tf.render(tf_ranking=tf_ranking,
-                      assays=assays,
-                      tf_tg_ranking=tf_tg_ranking,
-                      differential=differential,
+    f.write(tf.render(assays=assays,
+                      differential=tf_differential,
                       pairings=pairings))
 
 with open(os.path.join(out_dir, "target_genes.html"), "w") as f:
-    f.write(tg.render(tg_ranking=tg_ranking,
-                      assays=assays,
-                      tg_tf_ranking=tg_tf_ranking,
-                      differential=differential,
-                      pairings=pairings))
+    f.write(tg.render(assays=assays))
 
 with open(os.path.join(out_dir, "network.html"), "w") as f:
-    f.write(network.render(tf_tg_ranking=tf_tg_ranking,
-                           assays=assays,
-                           ))
+    f.write(network.render(assays=assays))
 
 with open(os.path.join(out_dir, "snps.html"), "w") as f:
     f.write(snp.render())
@@ -137,4 +210,5 @@ with open("versions.yml", "w") as f:
     f.write('"${task.process}":\\n')
     f.write(f'  python: "{sys.executable}"\\n')
     f.write(f'  pandas: "{pd.__version__}"\\n')
+    f.write(f'  numpy: "{np.__version__}"\\n')
     f.write(f'  jinja2: "{jinja2.__version__}"\\n')
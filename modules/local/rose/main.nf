@@ -9,7 +9,7 @@ process ROSE {
 
     input:
     tuple val(meta), path(bed)
-    tuple val(meta2), path(genepred)
+    tuple val(meta2), path(tss_index)
 
     output:
     tuple val(meta), path("${meta.id}.rose.bed"), emit: stitched
@@ -18,6 +18,7 @@ process ROSE {
     script:
     stitch = 12500
     tss_dist = 2500
+    stitch_engine = task.ext.stitch_engine ?: "sweep"
     template "rose.py"
 
     stub:
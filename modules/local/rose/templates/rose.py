@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
 
+import array
+import itertools
+import numpy as np
 import os
 import platform
 
@@ -22,59 +25,55 @@ def format_yaml_like(data: dict, indent: int = 0) -> str:
             yaml_str += f"{spaces}{key}: {value}\\n"
     return yaml_str
 
-def region_stitching(bound_collection, stitch_window, tss_window, start_dict):
+def region_stitching(bound_collection, stitch_window, tss_window, tss_index, stitch_engine='sweep'):
     print('Performing region stitching...')
 
     remove_tss = tss_window != 0
 
     # filter out all bound regions that overlap the TSS of an ACTIVE GENE
     if remove_tss:
-        # now makeTSS loci for active genes
-        remove_ticker = 0
-        # this loop makes a locus centered around +/- tss_window of transcribed genes
-        # then adds it to the list tss_loci
-        tss_loci = []
-        for gene_id in list(start_dict.keys()):
-            tss_loci.append(make_tss_locus(gene_id, start_dict, tss_window, tss_window))
-
-        # this turns the tss_loci list into a LocusCollection
-        # 50 is the internal parameter for LocusCollection and doesn't really matter
-        tss_collection = LocusCollection(tss_loci, 50)
+        # now make TSS windows of +/- tss_window around transcribed genes
+        _, tss_table = make_tss_table(tss_index, tss_window, tss_window)
 
         # gives all the loci in bound_collection
         bound_loci = bound_collection.get_loci()
 
-        # this loop will check if each bound region is contained by the TSS exclusion zone
+        # check which bound regions are contained by a TSS exclusion zone
         # this will drop out a lot of the promoter only regions that are tiny
         # typical exclusion window is around 2kb
-        for locus in bound_loci:
-            if len(tss_collection.get_containers(locus, 'both')) > 0:
-                # if true, the bound locus overlaps an active gene
-                bound_collection.remove(locus)
-                remove_ticker += 1
+        contained = contained_by_any(loci_to_table(bound_loci), tss_table)
+        for locus in itertools.compress(bound_loci, contained):
+            # the bound locus overlaps an active gene
+            bound_collection.remove(locus)
+        remove_ticker = int(contained.sum())
         print(f'Removed {remove_ticker} loci because they were contained by a TSS')
 
     # bound_collection is now all enriched region loci that don't overlap an active TSS
-    stitched_collection = bound_collection.stitch_collection(stitch_window, 'both')
+    stitched_collection = bound_collection.stitch_collection(stitch_window, 'both', stitch_engine)
 
     if remove_tss:
         # now replace any stitched region that overlap 2 distinct genes
         # with the original loci that were there
-        fixed_loci = []
-        tss_loci = []
-        for gene_id in list(start_dict.keys()):
-            tss_loci.append(make_tss_locus(gene_id, start_dict, 50, 50))
+        tss_names, tss_table = make_tss_table(tss_index, 50, 50)
+
+        # like a LocusCollection of TSS loci, windows with the same coordinates
+        # and strand are only kept once, for the first transcript in the index
+        first = first_unique_windows(tss_table, np.asarray(tss_index['sense']))
+        tss_table = tuple(column[first] for column in tss_table)
+        _, tss_names = np.unique(tss_names[first], return_inverse=True)
+
+        # count the distinct gene names overlapping each stitched locus
+        stitched_loci = stitched_collection.get_loci()
+        stitched_idx, tss_idx = overlap_pairs(loci_to_table(stitched_loci), tss_table)
+        n_names = len(tss_names)
+        distinct_pairs = np.unique(stitched_idx * n_names + tss_names[tss_idx])
+        name_counts = np.bincount(distinct_pairs // max(n_names, 1), minlength=len(stitched_loci))
 
-        # this turns the tss_loci list into a LocusCollection
-        # 50 is the internal parameter for LocusCollection and doesn't really matter
-        tss_collection = LocusCollection(tss_loci, 50)
+        fixed_loci = []
         remove_ticker = 0
         original_ticker = 0
-        for stitched_locus in stitched_collection.get_loci():
-            overlapping_tss_loci = tss_collection.get_overlap(stitched_locus, 'both')
-            tss_names = [start_dict[tssLocus.id()]['name'] for tssLocus in overlapping_tss_loci]
-            tss_names = uniquify(tss_names)
-            if len(tss_names) > 2:
+        for stitched_locus, name_count in zip(stitched_loci, name_counts):
+            if name_count > 2:
                 original_loci = bound_collection.get_overlap(stitched_locus, 'both')
                 original_ticker += len(original_loci)
                 fixed_loci += original_loci
@@ -94,50 +93,6 @@ def region_stitching(bound_collection, stitch_window, tss_window, start_dict):
 # ==========================I/O FUNCTIONS===========================
 # ==================================================================
 
-# unparse_table 4/14/08
-# takes in a table generated by parse_table and writes it to an output file
-# takes as parameters (table, output, sep), where sep is how the file is delimited
-# example call unparse_table(table, 'table.txt', '\t') for a tab del file
-
-def unparse_table(table, output, sep):
-    fh_out = open(output, 'w')
-    if len(sep) == 0:
-        for i in table:
-            fh_out.write(str(i))
-            fh_out.write('\\n')
-    else:
-        for line in table:
-            line = [str(x) for x in line]
-            line = sep.join(line)
-
-            fh_out.write(line)
-            fh_out.write('\\n')
-
-    fh_out.close()
-
-
-# parse_table 4/14/08
-# takes in a table where columns are separated by a given symbol and outputs
-# a nested list such that list[row][col]
-# example call:
-# table = parse_table('file.txt','\t')
-def parse_table(fn, sep, header=False, excel=False):
-    fh = open(fn)
-    lines = fh.readlines()
-    fh.close()
-    if excel:
-        lines = lines[0].split('\\r')
-    if lines[0].count('\\r') > 0:
-        lines = lines[0].split('\\r')
-    table = []
-    if header:
-        lines = lines[1:]
-    for i in lines:
-        table.append(i[:-1].split(sep))
-
-    return table
-
-
 def format_folder(folder_name, create=False):
     """
     makes sure a folder exists and if not makes it
@@ -166,79 +121,13 @@ def format_folder(folder_name, create=False):
 # ==================================================================
 
 
-def make_start_dict(annot_file):
-    transcripts = []
-
-    genepred_table, genepred_dict = import_genepred(annot_file)
-    if len(transcripts) == 0:
-        transcripts = list(genepred_dict.keys())
-    start_dict = {}
-    for transcript in transcripts:
-        if transcript not in genepred_dict:
-            continue
-        start_dict[transcript] = {}
-        start_dict[transcript]['sense'] = genepred_table[genepred_dict[transcript][0]][2]
-        start_dict[transcript]['chr'] = genepred_table[genepred_dict[transcript][0]][1]
-        start_dict[transcript]['start'] = get_tsss([transcript], genepred_table, genepred_dict)
-        if start_dict[transcript]['sense'] == '+':
-            start_dict[transcript]['end'] = [int(genepred_table[genepred_dict[transcript][0]][4])]
-        else:
-            start_dict[transcript]['end'] = [int(genepred_table[genepred_dict[transcript][0]][3])]
-        start_dict[transcript]['name'] = genepred_table[genepred_dict[transcript][0]][11]
-
-    return start_dict
-
-
-# generic function to get the TSS of any gene
-def get_tsss(gene_list, genepred_table, genepred_dict):
-    if len(gene_list) == 0:
-        genepred = genepred_table
-    else:
-        genepred = genepred_from_key(gene_list, genepred_dict, genepred_table)
-    tss = []
-    for line in genepred:
-        if line[2] == '+':
-            tss.append(line[3])
-        if line[2] == '-':
-            tss.append(line[4])
-    tss = list(map(int, tss))
-
-    return tss
-
-
-# 12/29/08
-# genepred_from_key(genepredKeyList,genepred_dict,genepred_table)
-# function that grabs genepred lines from genepred IDs
-def genepred_from_key(genepred_key_list, genepred_dict, genepred_table):
-    type_genepred = []
-    for name in genepred_key_list:
-        if name in genepred_dict:
-            type_genepred.append(genepred_table[genepred_dict[name][0]])
-    return type_genepred
-
-
-
-def import_genepred(genepred_file, return_multiples=False):
-    genepred_table = parse_table(genepred_file, '\\t')
-    genepred_dict = {}
-    ticker = 0
-    for line in genepred_table:
-        transcript = line[0]
-        if transcript in genepred_dict:
-            genepred_dict[transcript].append(ticker)
-        else:
-            genepred_dict[transcript] = [ticker]
-        ticker = ticker + 1
-
-    multiples = []
-    for i in genepred_dict:
-        if len(genepred_dict[i]) > 1:
-            multiples.append(i)
+def load_tss_index(index_file):
+    """
+    memory-maps a TSS index built by the TSS_INDEX module from a genePred file
+    one record per transcript with its chr, sense, tss, end and gene name
+    """
 
-    if return_multiples:
-        return genepred_table, genepred_dict, multiples
-    else:
-        return genepred_table, genepred_dict
+    return np.load(index_file, mmap_mode='r')
 
 
 # ==================================================================
@@ -249,6 +138,9 @@ def import_genepred(genepred_file, return_multiples=False):
 
 
 class Locus:
+    # loci are created in large numbers, so they keep no __dict__
+    __slots__ = ('_chr', '_sense', '_start', '_end', '_id', '_score')
+
     # this may save some space by reducing the number of chromosome strings
     # that are associated with Locus instances (see __init__).
     __chrDict = dict()
@@ -360,9 +252,70 @@ class Locus:
         pass
 
 
+class _ChrIndex:
+    # sorted-array index over the loci of a single chromosome, used by
+    # LocusCollection. positions are assigned in insertion order and are
+    # never reused, so they double as the insertion rank of a locus.
+    # coordinates and senses are kept in typed columns next to the loci.
+    def __init__(self):
+        self.__loci = []
+        self.__starts = array.array('q')
+        self.__ends = array.array('q')
+        self.__senses = array.array('b')
+        self.__alive = np.zeros(64, dtype=bool)
+        self.__n_sorted = 0
+
+    def add(self, lcs, sense_code):
+        position = len(self.__loci)
+        self.__loci.append(lcs)
+        self.__starts.append(lcs.start())
+        self.__ends.append(lcs.end())
+        self.__senses.append(sense_code)
+        if position >= len(self.__alive):
+            self.__alive = np.concatenate([self.__alive, np.zeros(len(self.__alive), dtype=bool)])
+        self.__alive[position] = True
+        return position
+
+    def remove(self, position):
+        self.__alive[position] = False
+
+    def get(self, positions):
+        return [self.__loci[i] for i in positions]
+
+    def __build(self):
+        starts = np.array(self.__starts, dtype=np.int64)
+        ends = np.array(self.__ends, dtype=np.int64)
+        self.__order = np.argsort(starts, kind='stable')
+        self.__sorted_starts = starts[self.__order]
+        self.__sorted_ends = ends[self.__order]
+        self.__sorted_senses = np.array(self.__senses, dtype=np.int8)[self.__order]
+        self.__max_len = int((ends - starts).max()) if len(starts) else 0
+        self.__n_sorted = len(self.__loci)
+
+    # returns positions, starts, ends and sense codes of all live loci that
+    # could overlap [start, end]
+    def candidates(self, start, end):
+        if self.__n_sorted != len(self.__loci):
+            self.__build()
+        lo = np.searchsorted(self.__sorted_starts, start - self.__max_len, side='left')
+        hi = np.searchsorted(self.__sorted_starts, end, side='right')
+        positions = self.__order[lo:hi]
+        alive = self.__alive[positions]
+        return (positions[alive], self.__sorted_starts[lo:hi][alive],
+                self.__sorted_ends[lo:hi][alive], self.__sorted_senses[lo:hi][alive])
+
+
 class LocusCollection:
+    # loci are indexed per chromosome in arrays sorted by start coordinate.
+    # a query only inspects the loci whose start lies within
+    # [query start - longest locus, query end], so the cost is logarithmic in
+    # the collection size plus the number of candidates.
+    # removed loci are masked rather than deleted so the sorted arrays only
+    # need to be rebuilt after new loci have been added.
+    __sense_codes = {'+': 1, '-': -1, '.': 0}
+
     def __init__(self, loci, window_size):
-        self.__chr_to_coord_to_loci = dict()
+        self.__chr_to_index = dict()
         self.__loci = dict()
         self.__win_size = window_size
         for lcs in loci:
@@ -370,24 +323,9 @@ class LocusCollection:
 
     def __add_locus(self, lcs):
         if lcs not in self.__loci:
-            self.__loci[lcs] = None
-            if lcs.sense() == '.':
-                chr_key_list = [lcs.chr() + '+', lcs.chr() + '-']
-            else:
-                chr_key_list = [lcs.chr() + lcs.sense()]
-            for chr_key in chr_key_list:
-                if chr_key not in self.__chr_to_coord_to_loci:
-                    self.__chr_to_coord_to_loci[chr_key] = dict()
-                for n in self.__get_key_range(lcs):
-                    if n not in self.__chr_to_coord_to_loci[chr_key]:
-                        self.__chr_to_coord_to_loci[chr_key][n] = []
-                    self.__chr_to_coord_to_loci[chr_key][n].append(lcs)
-
-    def __get_key_range(self, locus):
-        start = locus.start() // self.__win_size
-        # add 1 because of the range
-        end = locus.end() // self.__win_size + 1
-        return range(start, end)
+            if lcs.chr() not in self.__chr_to_index:
+                self.__chr_to_index[lcs.chr()] = _ChrIndex()
+            self.__loci[lcs] = self.__chr_to_index[lcs.chr()].add(lcs, self.__sense_codes[lcs.sense()])
 
     def __len__(self):
         return len(self.__loci)
@@ -405,14 +343,7 @@ class LocusCollection:
     def remove(self, old):
         if old not in self.__loci:
             raise ValueError("requested locus isn't in collection")
-        del self.__loci[old]
-        if old.sense() == '.':
-            sense_list = ['+', '-']
-        else:
-            sense_list = [old.sense()]
-        for k in self.__get_key_range(old):
-            for sense in sense_list:
-                self.__chr_to_coord_to_loci[old.chr() + sense][k].remove(old)
+        self.__chr_to_index[old.chr()].remove(self.__loci.pop(old))
 
     def get_window_size(self):
         return self.__win_size
@@ -421,83 +352,149 @@ class LocusCollection:
         return list(self.__loci.keys())
 
     def get_chr_list(self):
-        # i need to remove the strand info from the chromosome keys and make
-        # them non-redundant.
-        temp_keys = dict()
-        for k in list(self.__chr_to_coord_to_loci.keys()):
-            temp_keys[k[:-1]] = None
-        return list(temp_keys.keys())
-
-    def __subset_helper(self, locus, sense):
+        return list(self.__chr_to_index.keys())
+
+    # returns the members of the collection matching the locus, ordered the
+    # same way the original window-based implementation reported them:
+    # by strand pass, then by the first window shared with the locus, then
+    # by insertion order.
+    def __subset_helper(self, locus, sense, relation):
         sense = sense.lower()
         if ['sense', 'antisense', 'both'].count(sense) != 1:
             raise ValueError("sense command invalid: '" + sense + "'.")
-        matches = dict()
-        senses = ['+', '-']
-        if locus.sense() == '.' or sense == 'both':
-            lamb = lambda s: True
-        elif sense == 'sense':
-            lamb = lambda s: s == locus.sense()
-        elif sense == 'antisense':
-            lamb = lambda s: s != locus.sense()
+        index = self.__chr_to_index.get(locus.chr())
+        if index is None:
+            return []
+        positions, starts, ends, senses = index.candidates(locus.start(), locus.end())
+
+        if relation == 'overlap':
+            keep = (starts <= locus.end()) & (ends >= locus.start())
+        elif relation == 'contained':
+            keep = (starts >= locus.start()) & (ends <= locus.end())
+        else:
+            keep = (starts <= locus.start()) & (ends >= locus.end())
+
+        query_sense = self.__sense_codes[locus.sense()]
+        if query_sense != 0 and sense == 'sense':
+            keep &= senses != -query_sense
+        elif query_sense != 0 and sense == 'antisense':
+            keep &= senses != query_sense
+
+        positions, starts, senses = positions[keep], starts[keep], senses[keep]
+
+        # loci on the minus strand were only reached after the plus strand
+        # when both strands were searched
+        both_strands = query_sense == 0 or sense == 'both'
+        strand_pass = (senses == -1) if both_strands else np.zeros(len(senses), dtype=bool)
+        # with sense='both', antisense-only matches were appended after all
+        # sense-compatible ones
+        if sense == 'both' and query_sense != 0:
+            match_pass = senses == -query_sense
         else:
-            raise ValueError("sense value was inappropriate: '" + sense + "'.")
-        for s in filter(lamb, senses):
-            chr_key = locus.chr() + s
-            if chr_key in self.__chr_to_coord_to_loci:
-                for n in self.__get_key_range(locus):
-                    if n in self.__chr_to_coord_to_loci[chr_key]:
-                        for lcs in self.__chr_to_coord_to_loci[chr_key][n]:
-                            matches[lcs] = None
-        return list(matches.keys())
+            match_pass = np.zeros(len(senses), dtype=bool)
+        window = np.maximum(starts // self.__win_size, locus.start() // self.__win_size)
+
+        order = np.lexsort((positions, window, strand_pass, match_pass))
+        return index.get(positions[order])
 
     # sense can be 'sense' (default), 'antisense', or 'both'
     # returns all members of the collection that overlap the locus
     def get_overlap(self, locus, sense='sense'):
-        matches = self.__subset_helper(locus, sense)
-        # now, get rid of the ones that don't really overlap
-        real_matches = dict()
-        if sense == 'sense' or sense == 'both':
-            for i in [lcs for lcs in matches if lcs.overlaps(locus)]:
-                real_matches[i] = None
-        if sense == 'antisense' or sense == 'both':
-            for i in [lcs for lcs in matches if lcs.overlaps_antisense(locus)]:
-                real_matches[i] = None
-        return list(real_matches.keys())
+        return self.__subset_helper(locus, sense, 'overlap')
 
     # sense can be 'sense' (default), 'antisense', or 'both'
     # returns all members of the collection that are contained by the locus
     def get_contained(self, locus, sense='sense'):
-        matches = self.__subset_helper(locus, sense)
-        # now, get rid of the ones that don't really overlap
-        real_matches = dict()
-        if sense == 'sense' or sense == 'both':
-            for i in [lcs for lcs in matches if locus.contains(lcs)]:
-                real_matches[i] = None
-        if sense == 'antisense' or sense == 'both':
-            for i in [lcs for lcs in matches if locus.contains_antisense(lcs)]:
-                real_matches[i] = None
-        return list(real_matches.keys())
+        return self.__subset_helper(locus, sense, 'contained')
 
     # sense can be 'sense' (default), 'antisense', or 'both'
     # returns all members of the collection that contain the locus
     def get_containers(self, locus, sense='sense'):
-        matches = self.__subset_helper(locus, sense)
-        # now, get rid of the ones that don't really overlap
-        real_matches = dict()
-        if sense == 'sense' or sense == 'both':
-            for i in [lcs for lcs in matches if lcs.contains(locus)]:
-                real_matches[i] = None
-        if sense == 'antisense' or sense == 'both':
-            for i in [lcs for lcs in matches if lcs.contains_antisense(locus)]:
-                real_matches[i] = None
-        return list(real_matches.keys())
-
-    def stitch_collection(self, stitch_window=1, sense='both'):
+        return self.__subset_helper(locus, sense, 'containers')
+
+    def stitch_collection(self, stitch_window=1, sense='both', engine='sweep'):
 
         """
         reduces the collection by stitching together overlapping loci
         returns a new collection
+
+        engine can be 'sweep' (default) or 'legacy'. both produce the same
+        stitched loci for sense='both'; the legacy engine is kept for
+        regression comparison.
+        """
+
+        if engine == 'sweep':
+            return self.__stitch_sweep(stitch_window, sense)
+        elif engine == 'legacy':
+            return self.__stitch_legacy(stitch_window, sense)
+        else:
+            raise ValueError("stitching engine invalid: '" + engine + "'.")
+
+    def __stitch_sweep(self, stitch_window, sense):
+
+        """
+        stitches the collection in a single pass over the loci of each
+        chromosome (or chromosome and strand unless sense='both') sorted by
+        start. a locus joins the current stitched locus if it starts at most
+        stitch_window bases after the furthest end seen so far.
+        stitched loci are named after the first of their loci in collection
+        order and reported in that order, like the legacy engine.
+        with sense other than 'both', unstranded loci are only stitched
+        with other unstranded loci.
+        """
+
+        locus_list = self.get_loci()
+        stitched_collection = LocusCollection([], 500)
+        if len(locus_list) == 0:
+            return stitched_collection
+
+        sense_codes = self.__sense_codes
+        if sense == 'both':
+            group_keys = (chr_code(locus.chr()) for locus in locus_list)
+        else:
+            group_keys = (chr_code(locus.chr()) * 3 + sense_codes[locus.sense()] + 1 for locus in locus_list)
+        _, groups = np.unique(np.fromiter(group_keys, dtype=np.int64, count=len(locus_list)),
+                              return_inverse=True)
+        starts = np.fromiter((locus.start() for locus in locus_list), dtype=np.int64, count=len(locus_list))
+        ends = np.fromiter((locus.end() for locus in locus_list), dtype=np.int64, count=len(locus_list))
+
+        # sort by group, then start; the collection order breaks ties
+        order = np.lexsort((np.arange(len(locus_list)), starts, groups))
+        groups, starts, ends = groups[order], starts[order], ends[order]
+
+        # running maximum of the end coordinate within each group; offsetting
+        # every group above the previous one keeps the maximum from leaking
+        # across groups
+        group_first = np.r_[True, groups[1:] != groups[:-1]]
+        offset = groups * (ends.max() - ends.min() + 1)
+        reach = np.maximum.accumulate(ends + offset) - offset
+
+        new_cluster = group_first.copy()
+        new_cluster[1:] |= starts[1:] > reach[:-1] + stitch_window
+        cluster_bounds = np.flatnonzero(new_cluster)
+
+        cluster_starts = starts[cluster_bounds]
+        cluster_ends = np.maximum.reduceat(ends, cluster_bounds)
+        cluster_sizes = np.diff(np.r_[cluster_bounds, len(order)])
+        cluster_seeds = np.minimum.reduceat(order, cluster_bounds)
+
+        for i in np.argsort(cluster_seeds, kind='stable'):
+            locus = locus_list[cluster_seeds[i]]
+            if cluster_sizes[i] > 1:
+                if sense == 'both':
+                    locus = Locus(locus.chr(), cluster_starts[i], cluster_ends[i], '.', locus.id())
+                else:
+                    locus = Locus(locus.chr(), cluster_starts[i], cluster_ends[i], locus.sense(), locus.id())
+            locus._id = f'{cluster_sizes[i]}_{locus.id()}_lociStitched'
+            stitched_collection.append(locus)
+
+        return stitched_collection
+
+    def __stitch_legacy(self, stitch_window, sense):
+
+        """
+        stitches the collection by repeatedly querying the loci overlapping
+        the growing stitched locus
         """
 
         # initializing stitch_window to 1
@@ -542,78 +539,152 @@ class LocusCollection:
 # ==================================================================
 # ========================LOCUS FUNCTIONS===========================
 # ==================================================================
-# 06/11/09
-# turns a locusCollection into a bed
-# does not write to disk though
-def locus_collection_to_bed(locus_collection):
-    loci_list = locus_collection.get_loci()
-    bed = []
-    for locus in loci_list:
-        new_line = [locus.chr(), locus.coords()[0], locus.coords()[1], locus.id(), locus.score(), locus.sense()]
-        bed.append(new_line)
-    return bed
-
 
 def bed_to_locus_collection(bed, window=500):
     """
     opens up a bed file and turns it into a LocusCollection instance
+    the file is read line by line
     """
 
-    loci_list = [Locus(line[0], line[1], line[2], line[5], line[3])
-                    for line in parse_table(bed, '\\t')]
+    return LocusCollection(read_bed(bed), window)
 
-    return LocusCollection(loci_list, window)
 
+def read_bed(bed):
+    """
+    yields the loci of a bed file one line at a time
+    """
+
+    with open(bed) as fh:
+        for line in fh:
+            line = line.rstrip('\\r\\n')
+            if not line:
+                continue
+            line = line.split('\\t')
+            yield Locus(line[0], line[1], line[2], line[5], line[3])
 
-def make_tss_locus(gene, start_dict, upstream, downstream):
+
+def write_bed(locus_collection, output):
     """
-    given a start_dict, make a locus for any gene's TSS w/ upstream and downstream windows
+    writes a LocusCollection to a bed file one locus at a time
     """
 
-    start = start_dict[gene]['start'][0]
-    if start_dict[gene]['sense'] == '-':
-        return Locus(start_dict[gene]['chr'], start - downstream, start + upstream, '-', gene)
-    else:
-        return Locus(start_dict[gene]['chr'], start - upstream, start + downstream, '+', gene)
+    with open(output, 'w') as fh_out:
+        for locus in locus_collection.get_loci():
+            fh_out.write(f'{locus.chr()}\\t{locus.start()}\\t{locus.end()}\\t{locus.id()}\\t{locus.score()}\\t{locus.sense()}\\n')
 
 
-# ==================================================================
-# ========================MISC FUNCTIONS============================
-# ==================================================================
+# small integer codes for chromosome names, shared by all interval tables
+_chr_codes = dict()
+
+
+def chr_code(chr):
+    """
+    returns the integer code of a chromosome name
+    """
+
+    return _chr_codes.setdefault(chr, len(_chr_codes))
+
+
+def make_tss_table(tss_index, upstream, downstream):
+    """
+    given a TSS index, make TSS windows for all genes w/ upstream and downstream windows
+    returns the gene names and a (chr codes, starts, ends) table of the windows
+    """
 
+    chr_names, chrs = np.unique(tss_index['chr'], return_inverse=True)
+    chrs = np.array([chr_code(chr.decode()) for chr in chr_names], dtype=np.int32)[chrs]
+    tsss = np.asarray(tss_index['tss'])
+    minus = np.asarray(tss_index['sense']) == b'-'
+
+    starts = np.where(minus, tsss - downstream, tsss - upstream)
+    ends = np.where(minus, tsss + upstream, tsss + downstream)
+    return np.asarray(tss_index['name']), (chrs, np.minimum(starts, ends), np.maximum(starts, ends))
+
+
+def first_unique_windows(table, senses):
+    """
+    returns the indices of the first window of every distinct
+    (chr, start, end, sense), in table order
+    """
+
+    chrs, starts, ends = table
+    windows = np.rec.fromarrays([chrs, starts, ends, senses])
+    _, first = np.unique(windows, return_index=True)
+    return np.sort(first)
+
+
+def loci_to_table(loci):
+    """
+    turns a list of loci into arrays of chromosome codes, starts and ends
+    """
+
+    chrs = np.fromiter((chr_code(locus.chr()) for locus in loci), dtype=np.int32, count=len(loci))
+    starts = np.fromiter((locus.start() for locus in loci), dtype=np.int64, count=len(loci))
+    ends = np.fromiter((locus.end() for locus in loci), dtype=np.int64, count=len(loci))
+    return chrs, starts, ends
+
+
+def contained_by_any(query_table, target_table):
+    """
+    for each query interval, checks if any target interval on the same
+    chromosome contains it, regardless of strand
+    tables are (chr codes, starts, ends) as returned by loci_to_table
+    """
+
+    chrs, starts, ends = query_table
+    target_chrs, target_starts, target_ends = target_table
+    contained = np.zeros(len(starts), dtype=bool)
+    for chrom in np.intersect1d(chrs, target_chrs):
+        query = np.flatnonzero(chrs == chrom)
+        target = np.flatnonzero(target_chrs == chrom)
+        target = target[np.argsort(target_starts[target], kind='stable')]
+
+        # furthest end among the targets starting at or before each position
+        reach = np.maximum.accumulate(target_ends[target])
+        n_before = np.searchsorted(target_starts[target], starts[query], side='right')
+        contained[query] = (n_before > 0) & (reach[np.maximum(n_before - 1, 0)] >= ends[query])
+    return contained
+
+
+def overlap_pairs(query_table, target_table):
+    """
+    joins two interval tables on overlap, regardless of strand
+    returns the query and target indices of all overlapping pairs
+    """
 
-# uniquify function
-# by Peter Bengtsson
-# Used under a creative commons license
-# sourced from  here: http://www.peterbe.com/plog/uniqifiers-benchmark
-
-def uniquify(seq, idfun=None):
-    # order preserving
-    if idfun is None:
-        def idfun(x): return x
-    seen = {}
-    result = []
-    for item in seq:
-        marker = idfun(item)
-        # in old Python versions:
-        # if seen.has_key(marker)
-        # but in new ones:
-        if marker in seen: continue
-        seen[marker] = 1
-        result.append(item)
-    return result
-
-
-start_dict = make_start_dict("$genepred")
+    chrs, starts, ends = query_table
+    target_chrs, target_starts, target_ends = target_table
+    query_idx, target_idx = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+    for chrom in np.intersect1d(chrs, target_chrs):
+        query = np.flatnonzero(chrs == chrom)
+        target = np.flatnonzero(target_chrs == chrom)
+        target = target[np.argsort(target_starts[target], kind='stable')]
+        max_len = (target_ends[target] - target_starts[target]).max()
+
+        # candidates start within [query start - longest target, query end]
+        lo = np.searchsorted(target_starts[target], starts[query] - max_len, side='left')
+        hi = np.searchsorted(target_starts[target], ends[query], side='right')
+        n_candidates = hi - lo
+        pair_query = np.repeat(query, n_candidates)
+        offsets = np.arange(n_candidates.sum()) - np.repeat(np.cumsum(n_candidates) - n_candidates, n_candidates)
+        pair_target = target[np.repeat(lo, n_candidates) + offsets]
+
+        keep = target_ends[pair_target] >= starts[pair_query]
+        query_idx.append(pair_query[keep])
+        target_idx.append(pair_target[keep])
+    return np.concatenate(query_idx), np.concatenate(target_idx)
+
+
+tss_index = load_tss_index("$tss_index")
 locus_collection = bed_to_locus_collection("$bed")
-stitched_collection = region_stitching(locus_collection, int("$stitch"), int("$tss_dist"), start_dict)
-stitched = locus_collection_to_bed(stitched_collection)
-unparse_table(stitched, "${meta.id}.rose.bed", '\\t')
+stitched_collection = region_stitching(locus_collection, int("$stitch"), int("$tss_dist"), tss_index, "$stitch_engine")
+write_bed(stitched_collection, "${meta.id}.rose.bed")
 
 # Create version file
 versions = {
     "${task.process}" : {
-        "python": platform.python_version()
+        "python": platform.python_version(),
+        "numpy": np.__version__
     }
 }
 
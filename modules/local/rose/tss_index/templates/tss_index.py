@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+import hashlib
+import numpy as np
+import platform
+
+def format_yaml_like(data: dict, indent: int = 0) -> str:
+    """Formats a dictionary to a YAML-like string.
+
+    Args:
+        data (dict): The dictionary to format.
+        indent (int): The current indentation level.
+
+    Returns:
+        str: A string formatted as YAML.
+    """
+    yaml_str = ""
+    for key, value in data.items():
+        spaces = "  " * indent
+        if isinstance(value, dict):
+            yaml_str += f"{spaces}{key}:\\n{format_yaml_like(value, indent + 1)}"
+        else:
+            yaml_str += f"{spaces}{key}: {value}\\n"
+    return yaml_str
+
+genepred_path = "$genepred"
+
+# Checksum of the annotation, used to key the index file
+checksum = hashlib.sha256()
+with open(genepred_path, "rb") as f:
+    for chunk in iter(lambda: f.read(1 << 20), b""):
+        checksum.update(chunk)
+checksum = checksum.hexdigest()
+
+# Keep the first record of every transcript, like ROSE's start_dict
+transcripts = {}
+with open(genepred_path) as f:
+    for line in f:
+        fields = line.rstrip("\\r\\n").split("\\t")
+        if len(fields) < 12 or fields[0] in transcripts:
+            continue
+        name, chrom, strand, tx_start, tx_end = fields[:5]
+        if strand == "+":
+            tss, end = int(tx_start), int(tx_end)
+        elif strand == "-":
+            tss, end = int(tx_end), int(tx_start)
+        else:
+            continue
+        transcripts[name] = (name, chrom, strand, tss, end, fields[11])
+
+records = list(transcripts.values())
+
+def max_width(column):
+    return max([len(record[column]) for record in records], default=1)
+
+index = np.array(records, dtype=[
+    ("transcript", f"S{max_width(0)}"),
+    ("chr", f"S{max_width(1)}"),
+    ("sense", "S1"),
+    ("tss", np.int64),
+    ("end", np.int64),
+    ("name", f"S{max_width(5)}"),
+])
+
+# Plain .npy so ROSE can memory-map the index
+np.save(f"{checksum[:16]}.tss.npy", index)
+
+print(f"Indexed {len(index)} transcripts of annotation {checksum}")
+
+# Create version file
+versions = {
+    "${task.process}" : {
+        "python": platform.python_version(),
+        "numpy": np.__version__
+    }
+}
+
+with open("versions.yml", "w") as f:
+    f.write(format_yaml_like(versions))
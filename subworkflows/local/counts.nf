@@ -1,7 +1,4 @@
-include { COMBINE_COUNTS } from "../../modules/local/counts/combine"
-include { CALCULATE_TPM } from "../../modules/local/counts/calculate_tpm"
-include { FILTER_GENES } from "../../modules/local/counts/filter_genes"
-include { FILTER_GENES as FILTER_TFS } from "../../modules/local/counts/filter_genes"
+include { PROCESS_COUNTS } from "../../modules/local/counts/process_counts"
 include { PREPARE_DESIGN } from "../../modules/local/counts/prepare_design"
 include { DESEQ2_DIFFERENTIAL } from "../../modules/nf-core/deseq2/differential"
 
@@ -26,30 +23,16 @@ workflow COUNTS {
 
 
 
-    COMBINE_COUNTS(
+    // Combining, TPM calculation and both gene filters run in one task on the in-memory counts
+    PROCESS_COUNTS(
         ch_counts.map{counts -> [[id: "counts"], counts]},
         ch_extra_counts.map{ meta, file -> [meta.id, file] }
                         .reduce([[], []]) { accum, it -> [accum[0] + [it[0]], accum[1] + [it[1]]] },
         gene_map,
-        agg_method
-    )
-
-    CALCULATE_TPM(
-        COMBINE_COUNTS.out.counts,
         ch_gene_lengths,
-        gene_map
-    )
-
-    FILTER_GENES(
-        COMBINE_COUNTS.out.counts,
-        CALCULATE_TPM.out.tpm,
+        agg_method,
         min_count,
-        min_tpm
-    )
-
-    FILTER_TFS(
-        COMBINE_COUNTS.out.counts.map{ meta, counts -> [[id: "TFs"], counts]},
-        CALCULATE_TPM.out.tpm,
+        min_tpm,
         min_count_tf,
         min_tpm_tf
     )
@@ -66,26 +49,23 @@ workflow COUNTS {
                     variable, reference, target]},
         PREPARE_DESIGN.out.design
             .map{ meta, design -> design }
-            .combine(FILTER_GENES.out.counts)
+            .combine(PROCESS_COUNTS.out.filtered_counts)
         .map{design, meta, counts -> [meta, design, counts]}.collect(),
         [[], []],
         [[], []]
     )
 
     versions = ch_versions.mix(
-        COMBINE_COUNTS.out.versions,
-        CALCULATE_TPM.out.versions,
-        FILTER_GENES.out.versions,
-        FILTER_TFS.out.versions,
+        PROCESS_COUNTS.out.versions,
         PREPARE_DESIGN.out.versions,
         DESEQ2_DIFFERENTIAL.out.versions
     )
 
     emit:
-    genes = FILTER_GENES.out.genes
-    raw_counts = FILTER_GENES.out.counts
-    tfs = FILTER_TFS.out.genes
-    tpms = CALCULATE_TPM.out.tpm
+    genes = PROCESS_COUNTS.out.filtered_genes
+    raw_counts = PROCESS_COUNTS.out.filtered_counts
+    tfs = PROCESS_COUNTS.out.tfs
+    tpms = PROCESS_COUNTS.out.tpm
     normalized = DESEQ2_DIFFERENTIAL.out.normalised_counts
     differential = DESEQ2_DIFFERENTIAL.out.results
 
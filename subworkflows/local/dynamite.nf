@@ -10,6 +10,7 @@ workflow DYNAMITE {
     ifolds
     alpha
     randomize
+    performance
 
     main:
 
@@ -24,7 +25,7 @@ workflow DYNAMITE {
 
     PREPROCESS(ch_combined)
 
-    RUN_DYNAMITE(PREPROCESS.out.output, ofolds, ifolds, alpha, randomize)
+    RUN_DYNAMITE(PREPROCESS.out.output, ofolds, ifolds, alpha, randomize, performance)
 
     FILTER(RUN_DYNAMITE.out, [])
 
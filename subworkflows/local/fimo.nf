@@ -3,7 +3,9 @@ include { CAT_CAT as CONCAT_BEDS                } from "../../modules/nf-core/ca
 include { BEDTOOLS_SORT as SORT_REGIONS         } from "../../modules/nf-core/bedtools/sort"
 include { BEDTOOLS_MERGE as MERGE_REGIONS       } from "../../modules/nf-core/bedtools/merge"
 include { BEDTOOLS_GETFASTA as EXTRACT_SEQUENCE } from "../../modules/nf-core/bedtools/getfasta"
+include { SPLIT_FASTA                           } from "../../modules/local/fimo/split_fasta"
 include { RUN_FIMO                              } from "../../modules/local/fimo/run_fimo"
+include { SCAN_MOTIFS                           } from "../../modules/local/fimo/scan_motifs"
 include { COMBINE_RESULTS                       } from "../../modules/local/fimo/combine_results"
 
 workflow FIMO {
@@ -13,11 +15,14 @@ workflow FIMO {
         tf_ranking
         enhancer_regions
         motifs_meme
+        motif_batches
+        sequence_chunks
+        motif_scanner
 
     main:
         ch_versions = Channel.empty()
 
-        FILTER_MOTIFS(tf_ranking, motifs_meme)
+        FILTER_MOTIFS(tf_ranking, motifs_meme, motif_batches)
 
         ch_cat_input = enhancer_regions
             .map{meta, file -> file}
@@ -37,9 +42,34 @@ workflow FIMO {
             .filter(Path)
             .map{file -> [[motif: file.baseName], file]}
 
-        RUN_FIMO(ch_filtered_motifs, EXTRACT_SEQUENCE.out.fasta)
+        ch_sequences = EXTRACT_SEQUENCE.out.fasta.map{meta, fasta -> fasta}
 
-        ch_combine_results = RUN_FIMO.out.results
+        if (sequence_chunks > 1) {
+            SPLIT_FASTA(EXTRACT_SEQUENCE.out.fasta, sequence_chunks)
+            ch_sequences = SPLIT_FASTA.out.fasta
+                .map{meta, chunks -> chunks}
+                .flatten()
+            ch_versions = ch_versions.mix(SPLIT_FASTA.out.versions)
+        }
+
+        // Every motif file runs against every sequence chunk
+        ch_fimo_input = ch_filtered_motifs
+            .combine(ch_sequences)
+            .map{meta, motif_file, sequence_file ->
+                [[motif: sequence_chunks > 1 ? meta.motif + "_" + sequence_file.baseName : meta.motif],
+                    motif_file, sequence_file]}
+
+        if (motif_scanner == "numpy") {
+            SCAN_MOTIFS(ch_fimo_input)
+            ch_results = SCAN_MOTIFS.out.results
+            ch_versions = ch_versions.mix(SCAN_MOTIFS.out.versions)
+        } else {
+            RUN_FIMO(ch_fimo_input)
+            ch_results = RUN_FIMO.out.results
+            ch_versions = ch_versions.mix(RUN_FIMO.out.versions)
+        }
+
+        ch_combine_results = ch_results
             .map{meta, path -> path}
             .collect()
 
@@ -51,12 +81,12 @@ workflow FIMO {
             SORT_REGIONS.out.versions,
             MERGE_REGIONS.out.versions,
             EXTRACT_SEQUENCE.out.versions,
-            RUN_FIMO.out.versions,
             COMBINE_RESULTS.out.versions
         )
 
     emit:
         tsv = COMBINE_RESULTS.out.tsv
         gff = COMBINE_RESULTS.out.gff
+        index = COMBINE_RESULTS.out.index
         versions = ch_versions
 }
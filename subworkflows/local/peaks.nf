@@ -1,11 +1,10 @@
 // Modules
-include { GAWK as CLEAN_BED               } from '../../modules/nf-core/gawk/main'
-include { BEDTOOLS_SORT as SORT_PEAKS     } from '../../modules/nf-core/bedtools/sort/main'
-include { STARE                           } from '../../modules/local/peaks/stare'
-include { AGGREGATE_SYNONYMS              } from '../../modules/local/peaks/aggregate_synonyms/main'
-include { COMBINE_TABLES as AFFINITY_MEAN } from '../../modules/local/combine_tables/main'
-include { COMBINE_TABLES as AFFINITY_RATIO} from '../../modules/local/combine_tables/main'
-include { COMBINE_TABLES as AFFINITY_SUM  } from '../../modules/local/combine_tables/main'
+include { GAWK as CLEAN_BED                    } from '../../modules/nf-core/gawk/main'
+include { BEDTOOLS_SORT as SORT_PEAKS          } from '../../modules/nf-core/bedtools/sort/main'
+include { STARE                                } from '../../modules/local/peaks/stare'
+include { AGGREGATE_SYNONYMS                   } from '../../modules/local/peaks/aggregate_synonyms/main'
+include { COMBINE_TABLES as AFFINITY_MEAN      } from '../../modules/local/combine_tables/main'
+include { COMBINE_TABLES as AFFINITY_RATIO_SUM } from '../../modules/local/combine_tables/main'
 
 // Subworkflows
 include { FOOTPRINTING               } from './footprinting'
@@ -19,6 +18,7 @@ workflow PEAKS {
     ch_peaks // channel: [ val(meta), [ peaks ] ]
     fasta
     gtf
+    tss_index
     blacklist
     pwms
     window_size
@@ -61,7 +61,7 @@ workflow PEAKS {
     }
 
     CHROMHMM(ch_samplesheet_bam, chrom_sizes, chromhmm_states, chromhmm_threshold, chromhmm_marks)
-    ROSE(CHROMHMM.out.enhancers, gtf)
+    ROSE(CHROMHMM.out.enhancers, tss_index)
 
     ch_versions = ch_versions.mix(CHROMHMM.out.versions)
     ch_versions = ch_versions.mix(ROSE.out.versions)
@@ -124,19 +124,18 @@ workflow PEAKS {
                     assay: assay1],
                     [affinities1, affinities2]] }
 
-    AFFINITY_RATIO(ch_contrast_affinities, "ratio")
-    AFFINITY_SUM(ch_contrast_affinities, "sum")
+    // Both statistics come from the same pair of tables, so they are computed from one load
+    AFFINITY_RATIO_SUM(ch_contrast_affinities, "ratio,sum")
 
     ch_versions = ch_versions.mix(
         STARE.out.versions,
         AGGREGATE_SYNONYMS.out.versions,
-        AFFINITY_RATIO.out.versions,
-        AFFINITY_SUM.out.versions
+        AFFINITY_RATIO_SUM.out.versions
     )
 
     emit:
-    affinity_ratio = AFFINITY_RATIO.out.combined
-    affinity_sum = AFFINITY_SUM.out.combined
+    affinity_ratio = AFFINITY_RATIO_SUM.out.ratio
+    affinity_sum = AFFINITY_RATIO_SUM.out.sum
     enhancers = ROSE.out.enhancers
 
     versions = ch_versions                     // channel: [ versions.yml ]
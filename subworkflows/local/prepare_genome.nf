@@ -3,7 +3,10 @@ include { GUNZIP as GUNZIP_GTF   } from '../../modules/nf-core/gunzip'
 
 include { ATLASGENEANNOTATIONMANIPULATION_GTF2FEATUREANNOTATION as EXTRACT_ID_SYMBOL_MAP } from '../../modules/nf-core/atlasgeneannotationmanipulation/gtf2featureannotation'
 include { GTFTOOLS_LENGTH } from '../../modules/local/gtftools/length'
+include { GENE_LENGTHS    } from '../../modules/local/counts/gene_lengths'
 include { SAMTOOLS_FAIDX  } from '../../modules/nf-core/samtools/faidx'
+include { UCSC_GTFTOGENEPRED } from '../../modules/nf-core/ucsc/gtftogenepred'
+include { TSS_INDEX       } from '../../modules/local/rose/tss_index'
 
 workflow PREPARE_GENOME {
 
@@ -46,18 +49,33 @@ workflow PREPARE_GENOME {
     EXTRACT_ID_SYMBOL_MAP(ch_gtf, [[], []])
     GTFTOOLS_LENGTH(ch_gtf)
 
+    // Symbol-keyed gene lengths, computed once per annotation for the TPM calculation
+    GENE_LENGTHS(
+        ch_gtf,
+        GTFTOOLS_LENGTH.out.lengths,
+        EXTRACT_ID_SYMBOL_MAP.out.feature_annotation
+    )
+
     SAMTOOLS_FAIDX(ch_fasta, [[], []])
 
+    // Index transcription start sites once for all ROSE runs
+    UCSC_GTFTOGENEPRED(ch_gtf)
+    TSS_INDEX(UCSC_GTFTOGENEPRED.out.genepred)
+
     ch_versions = ch_versions.mix(
         EXTRACT_ID_SYMBOL_MAP.out.versions,
         GTFTOOLS_LENGTH.out.versions,
-        SAMTOOLS_FAIDX.out.versions
+        GENE_LENGTHS.out.versions,
+        SAMTOOLS_FAIDX.out.versions,
+        UCSC_GTFTOGENEPRED.out.versions,
+        TSS_INDEX.out.versions
     )
 
     emit:
     gene_map = EXTRACT_ID_SYMBOL_MAP.out.feature_annotation
-    gene_lengths = GTFTOOLS_LENGTH.out.lengths
+    gene_lengths = GENE_LENGTHS.out.lengths
     chrom_sizes = SAMTOOLS_FAIDX.out.fai.collect()
+    tss_index = TSS_INDEX.out.index
     fasta = ch_fasta
     gtf = ch_gtf
 
@@ -1,20 +1,17 @@
 include { ROSE as RUN_ROSE           } from "../../modules/local/rose"
-include { UCSC_GTFTOGENEPRED              } from "../../modules/nf-core/ucsc/gtftogenepred"
 
 workflow ROSE {
     take:
     ch_bed
-    ch_gtf
+    ch_tss_index
 
     main:
 
     ch_versions = Channel.empty()
 
-    UCSC_GTFTOGENEPRED(ch_gtf)
-    RUN_ROSE(ch_bed, UCSC_GTFTOGENEPRED.out.genepred)
+    RUN_ROSE(ch_bed, ch_tss_index)
 
     ch_versions = ch_versions.mix(RUN_ROSE.out.versions)
-    ch_versions = ch_versions.mix(UCSC_GTFTOGENEPRED.out.versions)
 
     emit:
     enhancers = RUN_ROSE.out.stitched
@@ -175,6 +175,21 @@ def getGenomeAttribute(attribute) {
     return null
 }
 
+//
+// SHA-256 checksum of a file, used to key caches by file content
+//
+def fileChecksum(path) {
+    def digest = java.security.MessageDigest.getInstance("SHA-256")
+    path.withInputStream { stream ->
+        def buffer = new byte[1 << 20]
+        def read
+        while ((read = stream.read(buffer)) != -1) {
+            digest.update(buffer, 0, read)
+        }
+    }
+    return digest.digest().encodeHex().toString()
+}
+
 //
 // Exit pipeline if incorrect --genome key provided
 //
@@ -61,6 +61,8 @@ def nextflow_runtime(
     blacklist: typing.Optional[LatchFile],
     motifs: typing.Optional[LatchFile],
     taxon_id: typing.Optional[int],
+    jaspar_db: typing.Optional[LatchFile],
+    jaspar_cache: typing.Optional[str],
     multiqc_methods_description: typing.Optional[str],
     min_peak_occurrence: typing.Optional[int],
     window_size: typing.Optional[int],
@@ -78,8 +80,14 @@ def nextflow_runtime(
     dynamite_ifolds: typing.Optional[int],
     dynamite_alpha: typing.Optional[float],
     dynamite_randomize: typing.Optional[bool],
+    dynamite_performance: typing.Optional[bool],
     dynamite_min_regression: typing.Optional[float],
     alpha: typing.Optional[float],
+    score_format: typing.Optional[str],
+    fimo_motif_batches: typing.Optional[int],
+    fimo_sequence_chunks: typing.Optional[int],
+    motif_scanner: typing.Optional[str],
+    fimo_index_hits: typing.Optional[bool],
 ) -> None:
     try:
         shared_dir = Path("/nf-workdir")
@@ -138,14 +146,22 @@ def nextflow_runtime(
             *get_flag("dynamite_ifolds", dynamite_ifolds),
             *get_flag("dynamite_alpha", dynamite_alpha),
             *get_flag("dynamite_randomize", dynamite_randomize),
+            *get_flag("dynamite_performance", dynamite_performance),
             *get_flag("dynamite_min_regression", dynamite_min_regression),
             *get_flag("alpha", alpha),
+            *get_flag("score_format", score_format),
+            *get_flag("fimo_motif_batches", fimo_motif_batches),
+            *get_flag("fimo_sequence_chunks", fimo_sequence_chunks),
+            *get_flag("motif_scanner", motif_scanner),
+            *get_flag("fimo_index_hits", fimo_index_hits),
             *get_flag("genome", genome),
             *get_flag("fasta", fasta),
             *get_flag("gtf", gtf),
             *get_flag("blacklist", blacklist),
             *get_flag("motifs", motifs),
             *get_flag("taxon_id", taxon_id),
+            *get_flag("jaspar_db", jaspar_db),
+            *get_flag("jaspar_cache", jaspar_cache),
             *get_flag("multiqc_methods_description", multiqc_methods_description),
         ]
 
@@ -202,6 +218,8 @@ def nf_nf_core_tfactivity(
     blacklist: typing.Optional[LatchFile],
     motifs: typing.Optional[LatchFile],
     taxon_id: typing.Optional[int],
+    jaspar_db: typing.Optional[LatchFile],
+    jaspar_cache: typing.Optional[str],
     multiqc_methods_description: typing.Optional[str],
     min_peak_occurrence: typing.Optional[int] = 1,
     window_size: typing.Optional[int] = 50000,
@@ -219,8 +237,14 @@ def nf_nf_core_tfactivity(
     dynamite_ifolds: typing.Optional[int] = 6,
     dynamite_alpha: typing.Optional[float] = 0.1,
     dynamite_randomize: typing.Optional[bool] = False,
+    dynamite_performance: typing.Optional[bool] = False,
     dynamite_min_regression: typing.Optional[float] = 0.1,
     alpha: typing.Optional[float] = 0.05,
+    score_format: typing.Optional[str] = "tsv",
+    fimo_motif_batches: typing.Optional[int] = 0,
+    fimo_sequence_chunks: typing.Optional[int] = 1,
+    motif_scanner: typing.Optional[str] = "fimo",
+    fimo_index_hits: typing.Optional[bool] = False,
 ) -> None:
     """
     nf-core/tfactivity
@@ -255,13 +279,21 @@ def nf_nf_core_tfactivity(
         dynamite_ifolds=dynamite_ifolds,
         dynamite_alpha=dynamite_alpha,
         dynamite_randomize=dynamite_randomize,
+        dynamite_performance=dynamite_performance,
         dynamite_min_regression=dynamite_min_regression,
         alpha=alpha,
+        score_format=score_format,
+        fimo_motif_batches=fimo_motif_batches,
+        fimo_sequence_chunks=fimo_sequence_chunks,
+        motif_scanner=motif_scanner,
+        fimo_index_hits=fimo_index_hits,
         genome=genome,
         fasta=fasta,
         gtf=gtf,
         blacklist=blacklist,
         motifs=motifs,
         taxon_id=taxon_id,
+        jaspar_db=jaspar_db,
+        jaspar_cache=jaspar_cache,
         multiqc_methods_description=multiqc_methods_description,
     )
@@ -36,9 +36,11 @@ workflow TFACTIVITY {
     blacklist
     ch_motifs
     ch_taxon_id
+    ch_jaspar_db
     gene_lengths
     gene_map
     chrom_sizes
+    tss_index
 
     // ChromHMM
     ch_samplesheet_bam
@@ -67,10 +69,16 @@ workflow TFACTIVITY {
     dynamite_ifolds
     dynamite_alpha
     dynamite_randomize
+    dynamite_performance
 
     // Ranking
     alpha
 
+    // FIMO
+    fimo_motif_batches
+    fimo_sequence_chunks
+    motif_scanner
+
     ch_versions
 
     main:
@@ -98,13 +106,15 @@ workflow TFACTIVITY {
     MOTIFS(
         ch_motifs,
         COUNTS.out.tfs,
-        ch_taxon_id
+        ch_taxon_id,
+        ch_jaspar_db
     )
 
     PEAKS(
         ch_samplesheet,
         fasta,
         gtf,
+        tss_index,
         blacklist,
         MOTIFS.out.psem,
         window_size,
@@ -126,7 +136,8 @@ workflow TFACTIVITY {
         dynamite_ofolds,
         dynamite_ifolds,
         dynamite_alpha,
-        dynamite_randomize
+        dynamite_randomize,
+        dynamite_performance
     )
 
     RANKING(
@@ -141,6 +152,9 @@ workflow TFACTIVITY {
         RANKING.out.tf_total_ranking,
         PEAKS.out.enhancers,
         MOTIFS.out.meme,
+        fimo_motif_batches,
+        fimo_sequence_chunks,
+        motif_scanner
     )
 
     REPORT(